@@ -0,0 +1,46 @@
+"""
+Helpers shared by the benchmarks that run a service from src/ locally
+"""
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_service(script, port, health_path='/health', **env):
+    """Run src/<script> under gunicorn (one worker) and wait until it answers"""
+    env = dict(dict(os.environ, SERVER='gunicorn', WORKERS='1', METRICS_ENABLED='0'),
+               PORT=str(port), **env)
+    process = subprocess.Popen([sys.executable, script], cwd=SRC, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        try:
+            conn.request('GET', health_path)
+            if conn.getresponse().status == 200:
+                return process
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        # Not up yet (refused) or not ready (non-200): poll again shortly
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{script} did not start on port {port}")
+
+
+def stop_service(process):
+    process.kill()
+    process.wait()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+CPU cost and bytes on the wire per response encoding (src/compression.py)
+
+Serves JSON arrays of synthetic books of several sizes through Flask's test
+client and, for identity, gzip, br and zstd, reports per request:
+
+    bytes     response body size as sent (and the ratio to identity)
+    dynamic   app time when the body is built and compressed on every call
+    cached    app time for a ResponseCache body, compressed once per encoding
+    decode    time the caller (or Envoy) spends decompressing it
+
+The identity row is the baseline: the difference is what compressing in
+the app costs, to weigh against the bytes saved (or against letting Envoy
+compress). The synthetic records are very repetitive, so real payloads
+compress less; pass --level to compare compression levels.
+
+br and zstd are skipped when brotli or zstandard is not installed.
+
+Usage:
+    python3 bench/compression.py [--payload-sizes 512,4096,65536,1048576] [--requests N]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('METRICS_ENABLED', '0')
+
+from flask import Flask, jsonify
+
+from catalog import SyntheticCatalog
+from compression import ENCODINGS, compress
+from responsecache import ResponseCache
+
+
+def _decoders():
+    decoders = {'identity': lambda data: data, 'gzip': gzip.decompress}
+    try:
+        import brotli
+        decoders['br'] = brotli.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        decoders['zstd'] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except ImportError:
+        pass
+    return decoders
+
+
+def books_of_size(size):
+    """Synthetic books whose JSON array is about size bytes"""
+    books, length = [], 2
+    for book in SyntheticCatalog(10 ** 9, 1000).iter_books():
+        if length >= size:
+            break
+        books.append(book)
+        length += len(json.dumps(book, separators=(',', ':'))) + 1
+    return books
+
+
+def build_app(encodings, payloads):
+    """/dynamic/<size> re-encodes on every call; /cached/<size> goes through ResponseCache"""
+    app = Flask(__name__)
+    cache = ResponseCache()
+    if encodings:
+        # Everything above one byte is compressed, so each size shows the raw cost
+        compress(app, encodings, min_size=1)
+
+    @app.route('/dynamic/<int:size>')
+    def dynamic(size):
+        return jsonify(payloads[size])
+
+    @app.route('/cached/<int:size>')
+    def cached(size):
+        return cache.json(size, lambda: payloads[size])
+
+    return app
+
+
+def seconds_per_request(client, path, headers, num_requests):
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        client.get(path, headers=headers)
+    return (time.perf_counter() - start) / num_requests
+
+
+def measure(app, size, encoding, decode, num_requests):
+    client = app.test_client()
+    headers = {'Accept-Encoding': encoding} if encoding != 'identity' else {}
+    response = client.get(f'/dynamic/{size}', headers=headers)
+    body = response.data
+    assert response.headers.get('Content-Encoding', 'identity') == encoding, encoding
+    # Fewer iterations for large bodies so every cell takes similar time
+    count = max(5, num_requests * 4096 // max(size, 4096))
+    start = time.perf_counter()
+    for _ in range(count):
+        decode(body)
+    decode_seconds = (time.perf_counter() - start) / count
+    return {
+        'bytes': len(body),
+        'dynamic_us': seconds_per_request(client, f'/dynamic/{size}', headers, count) * 1e6,
+        'cached_us': seconds_per_request(client, f'/cached/{size}', headers, count) * 1e6,
+        'decode_us': decode_seconds * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare response encodings by CPU cost and size')
+    parser.add_argument('--payload-sizes', default='512,4096,65536,1048576',
+                        help='Comma-separated JSON body sizes in bytes (default: 512,4096,65536,1048576)')
+    parser.add_argument('--requests', '-r', type=int, default=500,
+                        help='Requests per measurement for bodies up to 4 KB, fewer for larger ones '
+                             '(default: 500)')
+    parser.add_argument('--level', type=int,
+                        help='Compression level for every encoding (default: each encoding\'s default)')
+    args = parser.parse_args()
+
+    sizes = [int(value) for value in args.payload_sizes.split(',')]
+    payloads = {size: books_of_size(size) for size in sizes}
+    decoders = _decoders()
+    encodings = [name for name in ('identity',) + tuple(ENCODINGS) if name in decoders]
+    apps = {}
+    for encoding in encodings:
+        spec = '' if encoding == 'identity' else encoding
+        if spec and args.level is not None:
+            spec += f':{args.level}'
+        apps[encoding] = build_app(spec, payloads)
+
+    print("📈 RESPONSE COMPRESSION (per request, in-process)")
+    missing = [name for name in ENCODINGS if name not in decoders]
+    if missing:
+        print(f"⚠️  Skipping {', '.join(missing)} (package not installed)")
+    print("=" * 80)
+    print(f"   {'payload':>9s}  {'encoding':8s} {'bytes':>9s} {'ratio':>6s} "
+          f"{'dynamic µs':>11s} {'cached µs':>10s} {'decode µs':>10s}")
+    for size in sizes:
+        baseline = None
+        for encoding in encodings:
+            result = measure(apps[encoding], size, encoding, decoders[encoding], args.requests)
+            baseline = baseline or result
+            print(f"   {size:9d}  {encoding:8s} {result['bytes']:9d} "
+                  f"{baseline['bytes'] / result['bytes']:5.1f}x "
+                  f"{result['dynamic_us']:11.1f} {result['cached_us']:10.1f} {result['decode_us']:10.1f}")
+        print("-" * 80)
+
+
+if __name__ == '__main__':
+    main()
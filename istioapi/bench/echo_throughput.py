@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+echocaller /echo throughput for 1 KB, 64 KB and 1 MB request bodies
+
+Starts src/echocaller.py locally under gunicorn (one worker) and POSTs
+bodies of each size over one keep-alive connection, two ways:
+
+- summary:   POST /echo               (body is hashed, JSON metadata returned)
+- echo body: POST /echo?echo_body=1   (body streamed straight back)
+
+Reports requests/second and MB/s of request body for each.
+
+Usage:
+    python3 bench/echo_throughput.py [--requests N] [--sizes 1024,65536,1048576]
+
+Requires gunicorn (pip3 install -r requirements.txt).
+"""
+
+import argparse
+import http.client
+import os
+import time
+
+from benchutil import free_port, start_service, stop_service
+
+
+def run(port, path, body, num_requests):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/octet-stream',
+               'traceparent': '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'}
+    received = 0
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        conn.request('POST', path, body=body, headers=headers)
+        response = conn.getresponse()
+        received += len(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned {response.status}")
+    duration = time.perf_counter() - start
+    conn.close()
+    return num_requests / duration, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure echocaller /echo throughput by body size')
+    parser.add_argument('--requests', '-r', type=int, default=500,
+                        help='Requests per size and mode (default: 500)')
+    parser.add_argument('--sizes', default='1024,65536,1048576',
+                        help='Comma-separated body sizes in bytes (default: 1024,65536,1048576)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    port = free_port()
+    process = start_service('echocaller.py', port, health_path='/echo',
+                            ECHO_MAX_BODY=str(2 * max(sizes)))
+    print("📈 echocaller /echo THROUGHPUT (one keep-alive connection)")
+    print("=" * 72)
+    try:
+        for size in sizes:
+            body = os.urandom(size)
+            for mode, path in (('summary', '/echo'), ('echo body', '/echo?echo_body=1')):
+                rate, received = run(port, path, body, args.requests)
+                if mode == 'echo body' and received != size * args.requests:
+                    raise RuntimeError(f"echoed {received} bytes, expected {size * args.requests}")
+                print(f"   • {size / 1024:7.0f} KB {mode:9s}: {rate:8.0f} req/s | "
+                      f"{rate * size / 1e6:8.1f} MB/s")
+    finally:
+        stop_service(process)
+
+
+if __name__ == '__main__':
+    main()
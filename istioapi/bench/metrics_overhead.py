@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead of the /metrics instrumentation (src/metrics.py)
+
+Runs the same trivial route through Flask's test client with and without
+instrument(app) and reports the difference per request, plus the raw cost
+of Metrics.finish() and of rendering a scrape. Runs in-process, so no
+server or network is involved and the numbers isolate the instrumentation.
+
+Usage:
+    python3 bench/metrics_overhead.py [--requests N] [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from flask import Flask, jsonify
+
+from metrics import Metrics, instrument
+
+
+def build_app(instrumented):
+    app = Flask(__name__)
+    if instrumented:
+        instrument(app)
+
+    @app.route('/books/<int:book_id>')
+    def get_book(book_id):
+        return jsonify({"id": book_id})
+
+    return app
+
+
+def time_requests(app, num_requests):
+    """Seconds per request through the test client"""
+    client = app.test_client()
+    start = time.perf_counter()
+    for i in range(num_requests):
+        client.get(f'/books/{i}')
+    return (time.perf_counter() - start) / num_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /metrics instrumentation overhead')
+    parser.add_argument('--requests', '-r', type=int, default=5000,
+                        help='Requests per measurement (default: 5000)')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Measurements per variant; the fastest is reported (default: 5)')
+    args = parser.parse_args()
+
+    plain, instrumented = build_app(False), build_app(True)
+    # Interleave the variants so drift (CPU frequency, GC) affects both alike
+    plain_best = instrumented_best = float('inf')
+    for _ in range(args.rounds):
+        plain_best = min(plain_best, time_requests(plain, args.requests))
+        instrumented_best = min(instrumented_best, time_requests(instrumented, args.requests))
+
+    metrics = Metrics()
+    metrics.start('/books/<int:book_id>')
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        metrics._in_flight['/books/<int:book_id>'] += 1
+        metrics.finish('/books/<int:book_id>', 'GET', 200, 0.004)
+    finish_cost = (time.perf_counter() - start) / args.requests
+
+    render_app = instrumented.extensions['metrics']
+    start = time.perf_counter()
+    body = render_app.render()
+    render_cost = time.perf_counter() - start
+
+    overhead = instrumented_best - plain_best
+    print("📈 METRICS INSTRUMENTATION OVERHEAD")
+    print("=" * 60)
+    print(f"   • Plain request:         {plain_best * 1e6:8.1f} µs")
+    print(f"   • Instrumented request:  {instrumented_best * 1e6:8.1f} µs")
+    print(f"   • Overhead per request:  {overhead * 1e6:8.1f} µs ({overhead / plain_best * 100:.1f}%)")
+    print(f"   • Metrics.finish():      {finish_cost * 1e6:8.2f} µs")
+    print(f"   • Scrape render:         {render_cost * 1e3:8.2f} ms ({len(body)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Requests per second for /books and /authors: jsonify vs ResponseCache
+
+Serves the api1v3 dataset through Flask's test client three ways: encoding
+with jsonify on every call (the old routes), from the pre-serialized cache
+(src/responsecache.py), and as a 304 revalidation with If-None-Match.
+In-process, so the numbers isolate the per-request app cost.
+
+Usage:
+    python3 bench/response_cache.py [--requests N] [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+os.environ.setdefault('METRICS_ENABLED', '0')
+
+from flask import Flask, jsonify
+
+import api1v3
+
+
+def build_uncached_app():
+    """The routes as they were before the cache: jsonify on every call"""
+    app = Flask(__name__)
+
+    @app.route('/books')
+    def get_books():
+        return jsonify(api1v3.books)
+
+    @app.route('/authors')
+    def get_authors():
+        return jsonify([author["name"] + " v3" for author in api1v3.authors])
+
+    return app
+
+
+def requests_per_second(app, path, num_requests, headers=None):
+    client = app.test_client()
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        client.get(path, headers=headers)
+    return num_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare jsonify and cached responses')
+    parser.add_argument('--requests', '-r', type=int, default=5000,
+                        help='Requests per measurement (default: 5000)')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Measurements per variant; the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    uncached, cached = build_uncached_app(), api1v3.app
+    print("📈 RESPONSE CACHE (requests/second, in-process)")
+    print("=" * 72)
+    for path in ('/books', '/authors'):
+        etag = cached.test_client().get(path).headers['ETag']
+        best = {'jsonify': 0.0, 'cached': 0.0, '304': 0.0}
+        for _ in range(args.rounds):
+            best['jsonify'] = max(best['jsonify'], requests_per_second(uncached, path, args.requests))
+            best['cached'] = max(best['cached'], requests_per_second(cached, path, args.requests))
+            best['304'] = max(best['304'], requests_per_second(cached, path, args.requests,
+                                                               {'If-None-Match': etag}))
+        print(f"   • {path:9s} jsonify {best['jsonify']:8.0f} | cached {best['cached']:8.0f} "
+              f"({best['cached'] / best['jsonify']:.2f}x) | 304 {best['304']:8.0f}")
+
+
+if __name__ == '__main__':
+    main()
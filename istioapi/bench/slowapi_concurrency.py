@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+/fast latency of slowapi while many /very-slow calls are held open
+
+For each gunicorn worker class, starts src/slowapi.py locally (one worker),
+opens N concurrent /very-slow requests (10-15s each) and then measures
+/fast for a few seconds. With gthread every open slow call pins a thread,
+so /fast queues behind them; with gevent the delays are event-loop timers
+and /fast should stay in the low milliseconds.
+
+Usage:
+    python3 bench/slowapi_concurrency.py [--slow N] [--duration SECONDS]
+                                         [--worker-classes gthread,gevent]
+
+Requires gunicorn and gevent (pip3 install -r requirements.txt).
+"""
+
+import argparse
+import asyncio
+import http.client
+import threading
+import time
+
+from benchutil import free_port, start_service, stop_service
+
+
+def hold_slow_requests(port, count, ready, done):
+    """Open `count` /very-slow requests and keep them open until done is set"""
+    async def one():
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /very-slow HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            await reader.read()
+            writer.close()
+        except OSError:
+            pass
+
+    async def run():
+        tasks = [asyncio.ensure_future(one()) for _ in range(count)]
+        await asyncio.sleep(0.5)
+        ready.set()
+        while not done.is_set():
+            await asyncio.sleep(0.1)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+def measure_fast(port, duration, timeout=2.0):
+    """Sequential /fast latencies (seconds) and timeout count over `duration`"""
+    latencies, timeouts = [], 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+            conn.request('GET', '/fast')
+            conn.getresponse().read()
+            conn.close()
+            latencies.append(time.perf_counter() - start)
+        except OSError:
+            timeouts += 1
+    return latencies, timeouts
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure slowapi /fast latency under slow-call load')
+    parser.add_argument('--slow', type=int, default=500,
+                        help='Concurrent /very-slow requests to hold open (default: 500)')
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='Seconds to measure /fast for (default: 5)')
+    parser.add_argument('--worker-classes', default='gthread,gevent',
+                        help='Comma-separated gunicorn worker classes (default: gthread,gevent)')
+    args = parser.parse_args()
+
+    print(f"📈 slowapi /fast LATENCY WITH {args.slow} OPEN /very-slow CALLS")
+    print("=" * 72)
+    for worker_class in args.worker_classes.split(','):
+        port = free_port()
+        process = start_service('slowapi.py', port, WORKER_CLASS=worker_class)
+        ready, done = threading.Event(), threading.Event()
+        holder = threading.Thread(target=hold_slow_requests, args=(port, args.slow, ready, done))
+        holder.start()
+        try:
+            ready.wait()
+            latencies, timeouts = measure_fast(port, args.duration)
+        finally:
+            done.set()
+            holder.join()
+            stop_service(process)
+        latencies.sort()
+        print(f"   • {worker_class:8s} /fast: {len(latencies):5d} ok, {timeouts:3d} timed out | "
+              f"P50 {percentile(latencies, 50) * 1e3:8.2f} ms | "
+              f"P99 {percentile(latencies, 99) * 1e3:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
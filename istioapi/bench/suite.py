@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite and regression check for the istioapi services
+
+Starts each service from src/ locally under gunicorn (no Kubernetes or
+Istio needed), drives it with a fixed workload matrix
+
+    service route  x  client concurrency  x  request body size (POST routes)
+
+and records, per cell, throughput, latency percentiles, error count and
+the server's CPU time per request and peak RSS (read from /proc for the
+gunicorn master and its workers, so Linux only).
+
+Results are written as JSON. Given --baseline, every cell is compared with
+the same cell in the baseline and the run fails (exit code 1) when
+throughput drops, or P99 latency or CPU per request grows, by more than
+the thresholds. The client runs on the same machine, so compare baselines
+recorded on the same box with the same options.
+
+Usage:
+    python3 bench/suite.py --output baseline.json
+    python3 bench/suite.py --baseline baseline.json --output current.json
+    python3 bench/suite.py --services api1v1,echocaller --concurrency 1,16 --duration 5
+
+Requires gunicorn and gevent (pip3 install -r requirements.txt).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+from benchutil import SRC, free_port, start_service, stop_service
+
+# service -> how to start it and which routes to drive; body=True routes
+# are POSTed once per --payload-sizes entry
+SERVICES = {
+    'api1v1': {'script': 'api1v1.py', 'health': '/', 'routes': [
+        {'path': '/'},
+        {'path': '/books'},
+        {'path': '/books/2'},
+        {'path': '/authors'},
+    ]},
+    # The same catalog routes over each version's own dataset
+    'api1v2': {'script': 'api1v2.py', 'health': '/', 'routes': [
+        {'path': '/books'},
+        {'path': '/books/2'},
+        {'path': '/authors'},
+    ]},
+    'api1v3': {'script': 'api1v3.py', 'health': '/', 'routes': [
+        {'path': '/books'},
+        {'path': '/books/2'},
+        {'path': '/authors'},
+    ]},
+    'echocaller': {'script': 'echocaller.py', 'health': '/echo', 'routes': [
+        {'path': '/echo'},
+        {'path': '/echo', 'method': 'POST', 'body': True},
+        {'path': '/echo?echo_body=1', 'method': 'POST', 'body': True},
+    ]},
+    # A fixed seed keeps the 50% failures identical between runs
+    'appflaky': {'script': 'appflaky.py', 'health': '/admin/faults', 'env': {'FAULT_SEED': '1'},
+                 'routes': [{'path': '/unstable-endpoint'}]},
+    'slowapi': {'script': 'slowapi.py', 'health': '/health', 'routes': [
+        {'path': '/fast'},
+        {'path': '/health'},
+    ]},
+}
+
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def _process_tree(pid):
+    """pid and all its descendants (the gunicorn master and workers)"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def _cpu_seconds(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # utime and stime are fields 14 and 15; the command name in
+                # field 2 may contain spaces, so split after its ')'
+                fields = f.read().rsplit(')', 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+        except (OSError, IndexError):
+            pass
+    return total / CLK_TCK
+
+
+def _rss_bytes(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError):
+            pass
+    return total
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)]
+
+
+def drive(port, method, path, body, concurrency, duration):
+    """Closed-loop load: each thread sends back-to-back requests on one keep-alive connection"""
+    headers = {'Content-Type': 'application/octet-stream'} if body else {}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        own_latencies, own_errors = [], 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    own_errors += 1
+            except (OSError, http.client.HTTPException):
+                own_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            own_latencies.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(own_latencies)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def run_cell(process, port, method, path, body, concurrency, duration, warmup):
+    if warmup > 0:
+        drive(port, method, path, body, concurrency, warmup)
+    pids = _process_tree(process.pid)
+    cpu_before = _cpu_seconds(pids)
+    peak_rss = [_rss_bytes(pids)]
+    done = threading.Event()
+
+    def sample_rss():
+        while not done.wait(0.2):
+            peak_rss[0] = max(peak_rss[0], _rss_bytes(pids))
+
+    sampler = threading.Thread(target=sample_rss)
+    sampler.start()
+    try:
+        latencies, errors, elapsed = drive(port, method, path, body, concurrency, duration)
+    finally:
+        done.set()
+        sampler.join()
+    cpu = _cpu_seconds(pids) - cpu_before
+    latencies.sort()
+    count = len(latencies)
+    ms = lambda value: round(value * 1e3, 3) if value is not None else None
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput': round(count / elapsed, 1),
+        'p50_ms': ms(_percentile(latencies, 50)),
+        'p95_ms': ms(_percentile(latencies, 95)),
+        'p99_ms': ms(_percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'cpu_percent': round(cpu / elapsed * 100, 1),
+        'cpu_us_per_request': round(cpu / count * 1e6, 1) if count else None,
+        'peak_rss_mb': round(max(peak_rss[0], _rss_bytes(pids)) / 2**20, 1),
+    }
+
+
+def _format(value, spec):
+    """value formatted with spec, or n/a (same width) for a cell without requests"""
+    if value is None:
+        return f"{'n/a':>{spec.split('.')[0]}s}"
+    return f"{value:{spec}}"
+
+
+def cells(services, concurrency_levels, payload_sizes):
+    """(cell id, service, method, path, body size, concurrency) for the whole matrix"""
+    for service in services:
+        for route in SERVICES[service]['routes']:
+            method = route.get('method', 'GET')
+            sizes = payload_sizes if route.get('body') else [None]
+            for size in sizes:
+                for concurrency in concurrency_levels:
+                    cell = f"{service} {method} {route['path']} c={concurrency}"
+                    if size is not None:
+                        cell += f" body={size}"
+                    yield cell, service, method, route['path'], size, concurrency
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(args):
+    services = args.services.split(',')
+    unknown = [service for service in services if service not in SERVICES]
+    if unknown:
+        raise ValueError(f"unknown service(s): {', '.join(unknown)} (choose from {', '.join(SERVICES)})")
+    concurrency_levels = [int(value) for value in args.concurrency.split(',')]
+    payload_sizes = [int(value) for value in args.payload_sizes.split(',')]
+    matrix = list(cells(services, concurrency_levels, payload_sizes))
+
+    results = {}
+    for service in services:
+        config = SERVICES[service]
+        port = free_port()
+        env = dict(config.get('env', {}), WORKERS=str(args.workers),
+                   ECHO_MAX_BODY=str(2 * max(payload_sizes)))
+        process = start_service(config['script'], port, health_path=config['health'], **env)
+        try:
+            for cell, cell_service, method, path, size, concurrency in matrix:
+                if cell_service != service:
+                    continue
+                body = os.urandom(size) if size else None
+                results[cell] = run_cell(process, port, method, path, body, concurrency,
+                                         args.duration, args.warmup)
+                result = results[cell]
+                print(f"   • {cell:52s} {result['throughput']:8.0f} req/s | "
+                      f"P50 {_format(result['p50_ms'], '7.2f')} ms | "
+                      f"P99 {_format(result['p99_ms'], '7.2f')} ms | "
+                      f"CPU {_format(result['cpu_us_per_request'], '7.0f')} µs/req | "
+                      f"RSS {result['peak_rss_mb']:6.1f} MB", flush=True)
+        finally:
+            stop_service(process)
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'duration': args.duration,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold, latency_threshold):
+    """Regressions of current against baseline, as printable strings"""
+    regressions = []
+    print(f"\n📊 COMPARISON WITH BASELINE (commit {baseline['meta'].get('commit')})")
+    print("=" * 80)
+    for cell, now in current['results'].items():
+        before = baseline['results'].get(cell)
+        if not now['requests']:
+            # Nothing completed (service down or every request hung): no
+            # numbers to compare, and certainly not a pass
+            regressions.append(f"{cell}: no requests completed")
+            print(f"   ❌ {cell:52s} no requests completed")
+            continue
+        if before is None:
+            print(f"   • {cell:52s} (not in baseline)")
+            continue
+        changes = {
+            'throughput': (before['throughput'], now['throughput'], -threshold),
+            'p99_ms': (before['p99_ms'], now['p99_ms'], latency_threshold),
+            'cpu_us_per_request': (before['cpu_us_per_request'], now['cpu_us_per_request'], threshold),
+        }
+        parts, failed = [], False
+        for name, (old, new, limit) in changes.items():
+            if not old or new is None:
+                continue
+            delta = (new - old) / old * 100
+            # limit < 0: lower is worse (throughput); limit > 0: higher is worse
+            worse = delta < limit if limit < 0 else delta > limit
+            if worse:
+                failed = True
+                regressions.append(f"{cell}: {name} {old} -> {new} ({delta:+.1f}%)")
+            parts.append(f"{name} {delta:+6.1f}%")
+        print(f"   {'❌' if failed else '✅'} {cell:52s} {' | '.join(parts)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the istioapi services and check for regressions')
+    parser.add_argument('--services', default=','.join(SERVICES),
+                        help=f"Comma-separated services to run (default: {','.join(SERVICES)})")
+    parser.add_argument('--concurrency', default='1,8,32',
+                        help='Comma-separated client concurrency levels (default: 1,8,32)')
+    parser.add_argument('--payload-sizes', default='1024,65536',
+                        help='Comma-separated body sizes in bytes for POST routes (default: 1024,65536)')
+    parser.add_argument('--duration', type=float, default=3.0,
+                        help='Seconds measured per cell (default: 3)')
+    parser.add_argument('--warmup', type=float, default=0.5,
+                        help='Seconds of unmeasured load before each cell (default: 0.5)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='gunicorn worker processes per service (default: 1)')
+    parser.add_argument('--output', '-o',
+                        help='Write the results JSON here (use it as a later --baseline)')
+    parser.add_argument('--baseline', '-b',
+                        help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Allowed throughput drop / CPU per request growth in percent (default: 10)')
+    parser.add_argument('--latency-threshold', type=float, default=25.0,
+                        help='Allowed P99 latency growth in percent (default: 25)')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print("📈 ISTIOAPI BENCHMARK SUITE")
+    print("=" * 80)
+    try:
+        current = run_suite(args)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold, args.latency_threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond the thresholds:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond the thresholds")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,21 @@
 import os
-from flask import Flask, jsonify
+from flask import Flask
+
+from catalog import Catalog, register_catalog
+from compression import compress
+from identity import stamp_identity
+from metrics import instrument
+from responsecache import ResponseCache
+from serve import serve
 
 app = Flask(__name__)
+instrument(app)
+# X-Backend-Version / X-Backend-Pod on every response (see identity.py)
+stamp_identity(app, 'v3')
+# gzip/br/zstd when COMPRESSION is set (see compression.py)
+compress(app)
+# Bodies are encoded once; books/authors are only read into the catalog at startup
+cache = ResponseCache()
 
 books = [
     {"id": 1, "title": "Book One", "author": "Author A"},
@@ -29,16 +43,11 @@ authors = [
 
 @app.route('/', methods=['GET'])
 def get_default():
-    return jsonify("Supported endpoints: /books and /authors")
-
-@app.route('/books', methods=['GET'])
-def get_books():
-    return jsonify(books)
+    return cache.json('default', lambda: "Supported endpoints: /books and /authors")
 
-@app.route('/authors', methods=['GET'])
-def get_authors():
-    author_names = [author["name"] + " v3" for author in authors]
-    return jsonify(author_names)
+# /books, /books/<id>, /books/stream, /authors and /authors/<id>; DATASET_SIZE
+# swaps the lists above for a synthetic dataset (see catalog.py)
+register_catalog(app, Catalog.from_env(books, authors, " v3"), cache)
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    serve(app)
\ No newline at end of file
@@ -1,15 +1,20 @@
 from flask import Flask, jsonify
-import random
+
+from faults import inject_faults
+from identity import stamp_identity
+from metrics import instrument
+from serve import serve
 
 app = Flask(__name__)
+instrument(app)
+stamp_identity(app, 'v1')
+# Fails 50% of calls with a 500 unless FAULT_PROFILE says otherwise
+inject_faults(app, {'/unstable-endpoint': {'error_rate': 0.5, 'status_codes': {'500': 1}}})
 
 @app.route('/unstable-endpoint')
 def unstable_endpoint():
-    # Simulate a failure with a 50% chance
-    if random.random() < 0.5:
-        return jsonify({"message": "Request failed"}), 500
-    else:
-        return jsonify({"message": "Request succeeded"}), 200
+    # Injected failures are answered before this runs
+    return jsonify({"message": "Request succeeded"}), 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    serve(app)
@@ -0,0 +1,186 @@
+"""
+Books/authors catalog shared by api1v1, api1v2 and api1v3
+
+register_catalog(app, catalog, cache) adds the catalog routes:
+
+    /books                     all books as a JSON array
+    /books?limit=N&cursor=C    one page: {"items": [...], "next_cursor": C2 or null}
+    /books/stream              all books as chunked NDJSON (one book per line)
+    /books/<id>                one book, looked up by id
+    /authors                   all author names (with the version suffix)
+    /authors?limit=N&cursor=C  one page of author names
+    /authors/<id>              one author
+
+Each service ships a small in-memory dataset. Setting DATASET_SIZE replaces
+it with a synthetic one of that many books (up to millions) whose records
+are computed from their id, so memory use does not grow with the size;
+large responses are streamed instead of being built in memory.
+
+Environment variables:
+    DATASET_SIZE     number of synthetic books (default: unset, built-in data)
+    DATASET_AUTHORS  number of synthetic authors (default: DATASET_SIZE / 10)
+"""
+
+import json
+import os
+from bisect import bisect_right
+from itertools import islice
+
+from flask import Response, abort, jsonify, request, stream_with_context
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Records serialized per streamed chunk; amortizes the per-chunk overhead
+STREAM_BATCH = 256
+
+# Same compact form as jsonify
+_dumps = json.JSONEncoder(separators=(',', ':'), sort_keys=True).encode
+
+
+class Catalog:
+    """The built-in lists, indexed by id"""
+
+    synthetic = False
+
+    def __init__(self, books, authors, author_suffix=''):
+        self.author_suffix = author_suffix
+        self._books = {book['id']: book for book in books}
+        self._authors = {author['id']: author for author in authors}
+        self._book_ids = sorted(self._books)
+        self._author_ids = sorted(self._authors)
+
+    @classmethod
+    def from_env(cls, books, authors, author_suffix=''):
+        size = int(os.environ.get('DATASET_SIZE', 0))
+        if size > 0:
+            num_authors = int(os.environ.get('DATASET_AUTHORS', max(1, size // 10)))
+            return SyntheticCatalog(size, num_authors, author_suffix)
+        return cls(books, authors, author_suffix)
+
+    def book(self, book_id):
+        return self._books.get(book_id)
+
+    def author(self, author_id):
+        author = self._authors.get(author_id)
+        return author and dict(author, name=author['name'] + self.author_suffix)
+
+    def iter_books(self, after=0):
+        """Books in id order, starting after the given id"""
+        for book_id in self._book_ids[bisect_right(self._book_ids, after):]:
+            yield self._books[book_id]
+
+    def iter_authors(self, after=0):
+        for author_id in self._author_ids[bisect_right(self._author_ids, after):]:
+            yield self.author(author_id)
+
+
+class SyntheticCatalog(Catalog):
+    """DATASET_SIZE books computed on demand from their id (constant memory)"""
+
+    synthetic = True
+
+    def __init__(self, num_books, num_authors, author_suffix=''):
+        self.author_suffix = author_suffix
+        self.num_books = num_books
+        self.num_authors = num_authors
+
+    def book(self, book_id):
+        if not 1 <= book_id <= self.num_books:
+            return None
+        return {"id": book_id, "title": f"Book {book_id}",
+                "author": f"Author {(book_id - 1) % self.num_authors + 1}"}
+
+    def author(self, author_id):
+        if not 1 <= author_id <= self.num_authors:
+            return None
+        return {"id": author_id, "name": f"Author {author_id}{self.author_suffix}"}
+
+    def iter_books(self, after=0):
+        for book_id in range(max(after, 0) + 1, self.num_books + 1):
+            yield self.book(book_id)
+
+    def iter_authors(self, after=0):
+        for author_id in range(max(after, 0) + 1, self.num_authors + 1):
+            yield self.author(author_id)
+
+
+def _page(records, item=None):
+    """One cursor page of records; the cursor is the last id returned
+
+    item maps each record to what the page lists, so a page has the same
+    items as the unpaged route.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        after = int(request.args.get('cursor') or 0)
+    except ValueError:
+        abort(400, "limit and cursor must be integers")
+    # One extra record tells us whether there is a next page
+    items = list(islice(records(after), limit + 1))
+    next_cursor = str(items[limit - 1]['id']) if len(items) > limit else None
+    items = items[:limit]
+    return jsonify({"items": [item(record) for record in items] if item else items,
+                    "next_cursor": next_cursor})
+
+
+def _author_name(author):
+    return author['name']
+
+
+def _chunks(lines):
+    """Group serialized lines into chunks of STREAM_BATCH"""
+    while True:
+        batch = list(islice(lines, STREAM_BATCH))
+        if not batch:
+            return
+        yield ''.join(batch)
+
+
+def _stream_json_array(values):
+    def pieces():
+        separator = '['
+        for value in values:
+            yield separator + _dumps(value)
+            separator = ','
+        yield '[]\n' if separator == '[' else ']\n'
+    return Response(stream_with_context(_chunks(pieces())), mimetype='application/json')
+
+
+def register_catalog(app, catalog, cache):
+    """Add the /books and /authors routes for catalog to app"""
+
+    @app.route('/books', methods=['GET'])
+    def get_books():
+        if 'limit' in request.args or 'cursor' in request.args:
+            return _page(catalog.iter_books)
+        if catalog.synthetic:
+            return _stream_json_array(catalog.iter_books())
+        return cache.json('books', lambda: list(catalog.iter_books()))
+
+    @app.route('/books/stream', methods=['GET'])
+    def stream_books():
+        lines = (_dumps(book) + '\n' for book in catalog.iter_books())
+        return Response(stream_with_context(_chunks(lines)), mimetype='application/x-ndjson')
+
+    @app.route('/books/<int:book_id>', methods=['GET'])
+    def get_book(book_id):
+        book = catalog.book(book_id)
+        if book is None:
+            abort(404)
+        return jsonify(book)
+
+    @app.route('/authors', methods=['GET'])
+    def get_authors():
+        if 'limit' in request.args or 'cursor' in request.args:
+            return _page(catalog.iter_authors, _author_name)
+        names = (_author_name(author) for author in catalog.iter_authors())
+        if catalog.synthetic:
+            return _stream_json_array(names)
+        return cache.json('authors', lambda: list(names))
+
+    @app.route('/authors/<int:author_id>', methods=['GET'])
+    def get_author(author_id):
+        author = catalog.author(author_id)
+        if author is None:
+            abort(404)
+        return jsonify(author)
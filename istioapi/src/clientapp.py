@@ -1,45 +1,102 @@
+import math
 import os
 import requests
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from httppool import HttpPool
+
+def positive_int(name, default):
+    """Integer env var that must be at least 1; exits with a clear message otherwise"""
+    value = os.getenv(name, str(default))
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        sys.exit(f"{name} must be an integer >= 1, got '{value}'")
+    return number
+
+def bounded_float(name, default, positive=False):
+    """Number env var that must be >= 0 (> 0 if positive); exits with a clear message otherwise"""
+    value = os.getenv(name, str(default))
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number) or not (number > 0 if positive else number >= 0):
+        sys.exit(f"{name} must be a number {'> 0' if positive else '>= 0'}, got '{value}'")
+    return number
+
+# Probe settings; the defaults reproduce the original 100 sequential calls
+BATCH_SIZE = positive_int('BATCH_SIZE', 100)            # requests per batch
+CONCURRENCY = positive_int('CONCURRENCY', 1)            # requests in flight
+TARGET_RATE = bounded_float('TARGET_RATE', 0)           # req/s, 0 = as fast as possible
+BATCH_INTERVAL = bounded_float('BATCH_INTERVAL', 10)    # seconds between batches
+REQUEST_TIMEOUT = bounded_float('REQUEST_TIMEOUT', 10, positive=True)
+
+# Connection reuse is controlled by HTTP_CONNECTION_MODE / HTTP_POOL_SIZE;
+# by default there is one pooled keep-alive connection per concurrent request
+http = HttpPool.from_env(pool_size=CONCURRENCY)
+
 def call_unstable_endpoint(endpoint):
+    """Returns (succeeded, latency in seconds)"""
+    start = time.perf_counter()
     try:
-        response = requests.get(endpoint)
-        if response.status_code == 200:
-            return True
-        else:
-            return False
+        response = http.get(endpoint, timeout=REQUEST_TIMEOUT)
+        return response.status_code == 200, time.perf_counter() - start
     except requests.exceptions.RequestException:
-        return False
+        return False, time.perf_counter() - start
+
+def run_batch(pool, endpoint):
+    """Send BATCH_SIZE requests, paced at TARGET_RATE if set; returns results"""
+    batch_start = time.perf_counter()
+    futures = []
+    for i in range(BATCH_SIZE):
+        if TARGET_RATE > 0:
+            # Fixed schedule: a slow response does not delay the next send
+            delay = batch_start + i / TARGET_RATE - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        futures.append(pool.submit(call_unstable_endpoint, endpoint))
+    return [future.result() for future in futures]
+
+def percentile(sorted_values, percent):
+    return sorted_values[min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)]
 
 if __name__ == "__main__":
     endpoint = os.getenv('ENDPOINT_URL', 'http://appflaky.retryns.svc.cluster.local/unstable-endpoint')
+    pool = ThreadPoolExecutor(max_workers=CONCURRENCY)
+    
+    print(f"Probing {endpoint}: batch size {BATCH_SIZE}, concurrency {CONCURRENCY}, "
+          f"target rate {TARGET_RATE or 'unlimited'} req/s, {http.connection_mode} connections")
+    sys.stdout.flush()
     
     while True:
-        success_count = 0
-        failure_count = 0
-
         start_time = datetime.now()
         print(f"Test starts at {start_time}")
         sys.stdout.flush()
 
-        for _ in range(100):
-            if call_unstable_endpoint(endpoint):
-                success_count += 1
-            else:
-                failure_count += 1
+        results = run_batch(pool, endpoint)
 
         end_time = datetime.now()
         print(f"Test ends at {end_time}")
         sys.stdout.flush()
         
+        success_count = sum(1 for succeeded, _ in results if succeeded)
+        failure_count = len(results) - success_count
         total_requests = success_count + failure_count
         success_rate = (success_count / total_requests) * 100
         failure_rate = (failure_count / total_requests) * 100
+        latencies = sorted(latency for _, latency in results)
+        duration = (end_time - start_time).total_seconds()
         
         print(f"Success Rate: {success_rate:.2f}% ({success_count}/{total_requests}), Failure Rate: {failure_rate:.2f}% ({failure_count}/{total_requests})")
+        print(f"Latency P50: {percentile(latencies, 50) * 1000:.1f}ms, P95: {percentile(latencies, 95) * 1000:.1f}ms, "
+              f"P99: {percentile(latencies, 99) * 1000:.1f}ms, Max: {latencies[-1] * 1000:.1f}ms, "
+              f"Throughput: {total_requests / duration:.1f} req/s")
         sys.stdout.flush()
         
-        time.sleep(10)
\ No newline at end of file
+        time.sleep(BATCH_INTERVAL)
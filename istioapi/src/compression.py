@@ -0,0 +1,197 @@
+"""
+Response compression shared by the istioapi Flask services
+
+compress(app) negotiates Accept-Encoding and compresses responses with
+gzip, brotli (br) or zstd, so app-side compression can be compared with
+compression in Envoy (or none) on the same images:
+
+- only 200 responses of a compressible type (JSON, NDJSON, text) without a
+  Content-Encoding of their own are compressed
+- bodies shorter than COMPRESSION_MIN_SIZE are sent as they are: below
+  about one packet compression costs CPU without saving a round trip
+- streamed responses (/books/stream, /books with DATASET_SIZE) are
+  compressed chunk by chunk and flushed after each chunk, so they still
+  stream
+- responses with a strong ETag (the ResponseCache bodies) are compressed
+  once per encoding and later served from memory; their ETag is made weak
+  (W/"...") so If-None-Match revalidation keeps returning 304
+- every compressible response, and every 304, gets Vary: Accept-Encoding
+
+Encodings are offered in the order COMPRESSION lists them: among those the
+client accepts with the highest q-value, the first listed wins.
+
+Environment variables:
+    COMPRESSION           comma-separated encodings, each with an optional
+                          :level, e.g. zstd,br:5,gzip:9 (default: unset, no
+                          compression); default levels are gzip 6, br 4, zstd 3
+    COMPRESSION_MIN_SIZE  smallest body in bytes to compress (default: 1024)
+
+br needs the brotli package and zstd the zstandard package (both in
+requirements.txt); gzip only needs the standard library.
+"""
+
+import os
+import threading
+import zlib
+
+from flask import request
+
+DEFAULT_MIN_SIZE = 1024
+# Compressed static bodies kept per app; the oldest is dropped beyond this
+CACHE_ENTRIES = 64
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+
+
+def _gzip(level):
+    def compress(data):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip framing
+        return compressor.compress(data) + compressor.flush()
+
+    def stream():
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    return compress, stream
+
+
+def _brotli(level):
+    try:
+        import brotli
+    except ImportError:
+        raise ValueError("br compression needs brotli: pip3 install brotli")
+
+    def compress(data):
+        return brotli.compress(data, quality=level)
+
+    def stream():
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.flush, compressor.finish
+    return compress, stream
+
+
+def _zstd(level):
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression needs zstandard: pip3 install zstandard")
+    # ZstdCompressor objects must not be shared between threads
+    local = threading.local()
+
+    def compress(data):
+        compressor = getattr(local, 'compressor', None)
+        if compressor is None:
+            compressor = local.compressor = zstandard.ZstdCompressor(level=level)
+        return compressor.compress(data)
+
+    def stream():
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return (compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                compressor.flush)
+    return compress, stream
+
+
+# encoding -> (default level, factory returning (compress(bytes), stream()))
+# where stream() returns (compress chunk, flush, finish) for one response
+ENCODINGS = {
+    'gzip': (6, _gzip),
+    'br': (4, _brotli),
+    'zstd': (3, _zstd),
+}
+
+
+def parse_encodings(spec):
+    """[(encoding, level)] from 'zstd,br:5,gzip:9'"""
+    encodings = []
+    for part in spec.split(','):
+        name, _, level = part.strip().partition(':')
+        if name not in ENCODINGS:
+            raise ValueError(f"unknown encoding '{name}' (choose from {', '.join(ENCODINGS)})")
+        encodings.append((name, int(level) if level else ENCODINGS[name][0]))
+    return encodings
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+class Compressor:
+    def __init__(self, encodings, min_size=DEFAULT_MIN_SIZE):
+        if not encodings:
+            raise ValueError("no encodings to compress with")
+        self.names = [name for name, _ in encodings]
+        self.min_size = min_size
+        self._codecs = {name: ENCODINGS[name][1](level) for name, level in encodings}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def negotiate(self):
+        """The encoding to use for the current request, or None"""
+        if 'Accept-Encoding' not in request.headers:
+            return None
+        return request.accept_encodings.best_match(self.names)
+
+    def _cached(self, etag, encoding, data):
+        key = (etag, encoding)
+        body = self._cache.get(key)
+        if body is None:
+            body = self._codecs[encoding][0](data)
+            with self._lock:
+                if len(self._cache) >= CACHE_ENTRIES:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = body
+        return body
+
+    def _stream(self, chunks, encoding):
+        compress, flush, finish = self._codecs[encoding][1]()
+        for chunk in chunks:
+            if chunk:
+                yield compress(chunk) + flush()
+        yield finish()
+
+    def apply(self, response):
+        """Compress response in place when the request and response allow it"""
+        if response.status_code == 304:
+            # Revalidation of a cached body: send the Vary and ETag the 200
+            # would carry, so caches keep one entry per encoding
+            response.vary.add('Accept-Encoding')
+            etag, weak = response.get_etag()
+            if etag and not weak and self.negotiate():
+                response.set_etag(etag, weak=True)
+            return response
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or not _compressible(response)):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_data(self._cached(etag, encoding, data))
+                response.set_etag(etag, weak=True)
+            else:
+                response.set_data(self._codecs[encoding][0](data))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def compress(app, encodings=None, min_size=None):
+    """Compress the responses of a Flask app; encodings and min_size default to the env vars"""
+    spec = encodings if encodings is not None else os.getenv('COMPRESSION', '')
+    if not spec.strip():
+        return None
+    if min_size is None:
+        min_size = int(os.getenv('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE))
+    compressor = Compressor(parse_encodings(spec), min_size)
+    app.after_request(compressor.apply)
+    app.extensions['compression'] = compressor
+    return compressor
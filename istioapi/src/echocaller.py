@@ -1,36 +1,126 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, abort, request, jsonify, stream_with_context
+import hashlib
+import os
+import time
+
+from compression import compress
+from identity import stamp_identity
+from metrics import instrument
+from serve import serve
 
 app = Flask(__name__)
+instrument(app)
+stamp_identity(app, 'v1')
+compress(app)
+
+# Comma-separated header names to echo (default: all of them)
+ECHO_HEADERS = {name.strip().lower() for name in os.environ.get('ECHO_HEADERS', '').split(',') if name.strip()}
+# Credentials are masked unless ECHO_RAW_AUTHORIZATION=1
+RAW_AUTHORIZATION = os.environ.get('ECHO_RAW_AUTHORIZATION', '0').lower() in ('1', 'true', 'yes')
+SENSITIVE_HEADERS = {'authorization', 'cookie', 'proxy-authorization'}
+# Headers whose auth scheme is kept, and the schemes recognised
+SCHEME_HEADERS = {'authorization', 'proxy-authorization'}
+AUTH_SCHEMES = {'basic', 'bearer', 'digest', 'negotiate', 'ntlm', 'dpop', 'aws4-hmac-sha256'}
+# Larger request bodies are rejected with 413
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('ECHO_MAX_BODY', 10 * 1024 * 1024))
+CHUNK_SIZE = 64 * 1024
+
+# W3C Trace Context, B3 (multi and single header) and Envoy's request id
+TRACE_HEADERS = ('traceparent', 'tracestate', 'b3', 'x-b3-traceid', 'x-b3-spanid',
+                 'x-b3-parentspanid', 'x-b3-sampled', 'x-b3-flags', 'x-request-id',
+                 'x-ot-span-context')
+
+def masked(name, value):
+    if RAW_AUTHORIZATION or name.lower() not in SENSITIVE_HEADERS:
+        return value
+    # Keep a known scheme (e.g. Bearer) so auth-policy labs can still see it;
+    # anything else, cookies included, is redacted whole
+    scheme, _, credentials = value.partition(' ')
+    if name.lower() in SCHEME_HEADERS and credentials and scheme.lower() in AUTH_SCHEMES:
+        return f"{scheme} <redacted {len(credentials)} chars>"
+    return f"<redacted {len(value)} chars>"
+
+def echoed_headers():
+    headers = {}
+    for name, value in request.headers.items():
+        if ECHO_HEADERS and name.lower() not in ECHO_HEADERS:
+            continue
+        value = masked(name, value)
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    return headers
+
+def trace_context():
+    trace = {name: request.headers[name] for name in TRACE_HEADERS if name in request.headers}
+    # traceparent: version-traceid-parentid-flags
+    parts = trace.get('traceparent', '').split('-')
+    if len(parts) == 4:
+        trace['trace_id'], trace['parent_id'] = parts[1], parts[2]
+        trace['sampled'] = parts[3] == '01'
+    elif 'x-b3-traceid' in trace:
+        trace['trace_id'] = trace['x-b3-traceid']
+        trace['sampled'] = trace.get('x-b3-sampled') == '1'
+    return trace
 
-@app.route('/echo', methods=['GET'])
+def stream_body():
+    """Request body in CHUNK_SIZE pieces, read straight off the socket"""
+    while True:
+        chunk = request.stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+@app.route('/echo', methods=['GET', 'POST', 'PUT'])
 def echo():
-    caller_ip = request.remote_addr
-    user_agent = request.headers.get('User-Agent')
-    host = request.headers.get('Host')
-    accept = request.headers.get('Accept')
-    accept_language = request.headers.get('Accept-Language')
-    referer = request.headers.get('Referer')
-    content_type = request.headers.get('Content-Type')
-    content_length = request.headers.get('Content-Length')
-    authorization = request.headers.get('Authorization')
-    x_forwarded_for = request.headers.get('X-Forwarded-For')
-    x_real_ip = request.headers.get('X-Real-IP')
+    received_at = time.time()
+    start = time.perf_counter()
+    trace = trace_context()
+
+    # ?echo_body=1 streams the request body back unchanged; metadata moves to
+    # response headers so the body is never held in memory or copied twice
+    if request.method != 'GET' and request.args.get('echo_body') in ('1', 'true'):
+        # The body is only read once the response is streaming, too late for
+        # a 413, so reject oversize bodies up front
+        if (request.content_length or 0) > app.config['MAX_CONTENT_LENGTH']:
+            abort(413)
+        headers = {'X-Echo-Caller-IP': request.remote_addr or ''}
+        if 'trace_id' in trace:
+            headers['X-Echo-Trace-Id'] = trace['trace_id']
+        return Response(stream_with_context(stream_body()), headers=headers,
+                        content_type=request.content_type or 'application/octet-stream')
 
+    authorization = request.headers.get('Authorization')
     response = {
-        'caller_ip': caller_ip,
-        'user_agent': user_agent,
-        'host': host,
-        'accept': accept,
-        'accept_language': accept_language,
-        'referer': referer,
-        'content_type': content_type,
-        'content_length': content_length,
-        'authorization': authorization,
-        'x_forwarded_for': x_forwarded_for,
-        'x_real_ip': x_real_ip
+        'caller_ip': request.remote_addr,
+        'user_agent': request.headers.get('User-Agent'),
+        'host': request.headers.get('Host'),
+        'accept': request.headers.get('Accept'),
+        'accept_language': request.headers.get('Accept-Language'),
+        'referer': request.headers.get('Referer'),
+        'content_type': request.headers.get('Content-Type'),
+        'content_length': request.headers.get('Content-Length'),
+        'authorization': authorization and masked('Authorization', authorization),
+        'x_forwarded_for': request.headers.get('X-Forwarded-For'),
+        'x_real_ip': request.headers.get('X-Real-IP'),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'headers': echoed_headers(),
+        'trace': trace,
     }
 
-    return jsonify(response)
+    if request.method != 'GET':
+        # Hash the body while reading it so its size/digest can be checked
+        # without keeping it around
+        digest, size = hashlib.sha256(), 0
+        for chunk in stream_body():
+            digest.update(chunk)
+            size += len(chunk)
+        response['body'] = {'bytes': size, 'sha256': digest.hexdigest()}
+
+    handler_ms = (time.perf_counter() - start) * 1000
+    response['timing'] = {'received_at': received_at, 'handler_ms': round(handler_ms, 3)}
+    result = jsonify(response)
+    result.headers['Server-Timing'] = f"app;dur={handler_ms:.3f}"
+    return result
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    serve(app)
@@ -0,0 +1,274 @@
+"""
+Seedable fault injection shared by appflaky and slowapi
+
+inject_faults(app, defaults) makes the routes named in a fault profile fail
+or slow down in a reproducible way. A profile maps URL rules to faults:
+
+    {
+      "seed": 42,
+      "routes": {
+        "/unstable-endpoint": {"error_rate": 0.5},
+        "/slow": {"latency": {"dist": "uniform", "min": 3, "max": 8}},
+        "/books": {
+          "error_rate": 0.01,
+          "status_codes": {"503": 3, "500": 1},
+          "latency": {"dist": "lognormal", "median": 0.05, "sigma": 0.8, "cap": 10},
+          "error_above": 2.0,
+          "bursts": {"every": 1000, "length": 100, "error_rate": 0.8, "latency_scale": 5}
+        }
+      }
+    }
+
+Per route:
+    error_rate     fraction of requests that fail (default: 0)
+    status_codes   weights of the failure status codes (default: {"500": 1})
+    latency        delay added before responding; dist is one of
+                   fixed{value}, uniform{min,max}, normal{mean,stddev},
+                   exponential{mean}, lognormal{median,sigma}; optional cap
+                   in seconds (default: no delay)
+    error_above    requests whose drawn delay exceeds this many seconds give
+                   up after it and fail, so errors follow latency spikes
+    bursts         brownouts: the last `length` of every `every` requests use
+                   the burst error_rate and multiply delays by latency_scale
+
+Each route draws from its own random generator seeded with seed + route,
+so the Nth request to a route gets the same fault on every run with the
+same profile, whatever the other routes see. The profile and sequences live
+in process memory: each gunicorn worker would have its own sequence, and
+admin changes would reach only the worker that answered. serve() therefore
+runs apps with faults in a single worker (with more threads) by default,
+and the sequence is only reproducible with WORKERS=1.
+
+Admin endpoint (disable with FAULT_ADMIN=0):
+    GET  /admin/faults          active profile and per-route counts
+    PUT  /admin/faults          merge a profile (a route set to null is
+                                removed) and restart every sequence
+    POST /admin/faults/reset    restart every sequence with the same profile
+
+Per-request cost for routes without a profile is one dict lookup; with a
+profile it is a lock and two or three random draws.
+
+Environment variables:
+    FAULT_PROFILE  profile JSON, or the path of a JSON file; its routes
+                   replace the service's defaults (default: unset)
+    FAULT_SEED     overrides the profile's seed (default: 0)
+    FAULT_ADMIN    set to 0/false to disable the admin endpoint (default: enabled)
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+from flask import g, jsonify, request
+
+
+class Fault:
+    __slots__ = ('status', 'delay')
+
+    def __init__(self, status=None, delay=0.0):
+        self.status = status
+        self.delay = delay
+
+
+NO_FAULT = Fault()
+
+
+def _latency_sampler(route, spec):
+    """A function rng -> delay (seconds) for a latency spec"""
+    if not spec:
+        return None
+
+    def param(name, positive=False):
+        # Checked here so a bad value is a 400 from the admin endpoint, not
+        # a ZeroDivisionError (or a negative sleep) at request time
+        value = float(spec[name])
+        if value < 0 or (positive and value == 0):
+            raise ValueError(f"{route}: latency {name} must be {'> 0' if positive else '>= 0'}")
+        return value
+
+    dist = spec.get('dist', 'fixed')
+    if dist == 'fixed':
+        value = param('value')
+        sample = lambda rng: value
+    elif dist == 'uniform':
+        low, high = param('min'), param('max')
+        if low > high:
+            raise ValueError(f"{route}: latency min must not exceed max")
+        sample = lambda rng: rng.uniform(low, high)
+    elif dist == 'normal':
+        mean, stddev = param('mean'), param('stddev')
+        sample = lambda rng: max(0.0, rng.gauss(mean, stddev))
+    elif dist == 'exponential':
+        rate = 1.0 / param('mean', positive=True)
+        sample = lambda rng: rng.expovariate(rate)
+    elif dist == 'lognormal':
+        mu, sigma = math.log(param('median', positive=True)), param('sigma')
+        sample = lambda rng: rng.lognormvariate(mu, sigma)
+    else:
+        raise ValueError(f"{route}: unknown latency dist '{dist}'")
+    if 'cap' in spec:
+        cap = param('cap')
+        return lambda rng: min(sample(rng), cap)
+    return sample
+
+
+class RouteFaults:
+    """One route's compiled profile and its random sequence"""
+
+    def __init__(self, route, spec, seed):
+        self.route = route
+        self.spec = spec
+        self.error_rate = float(spec.get('error_rate', 0))
+        codes = spec.get('status_codes') or {'500': 1}
+        self.statuses = [int(code) for code in codes]
+        self.cumulative_weights = list(accumulate(float(weight) for weight in codes.values()))
+        self.sample_latency = _latency_sampler(route, spec.get('latency'))
+        error_above = spec.get('error_above')
+        self.error_above = float(error_above) if error_above is not None else None
+        bursts = spec.get('bursts') or {}
+        self.burst_every = int(bursts.get('every', 0))
+        self.burst_length = int(bursts.get('length', 0))
+        self.burst_error_rate = float(bursts.get('error_rate', self.error_rate))
+        self.burst_latency_scale = float(bursts.get('latency_scale', 1))
+        if not 0 <= self.error_rate <= 1 or not 0 <= self.burst_error_rate <= 1:
+            raise ValueError(f"{route}: error_rate must be between 0 and 1")
+        if self.burst_every and not 0 < self.burst_length <= self.burst_every:
+            raise ValueError(f"{route}: bursts.length must be between 1 and bursts.every")
+        if self.error_above is not None and self.error_above < 0:
+            raise ValueError(f"{route}: error_above must be >= 0")
+        if self.burst_latency_scale < 0:
+            raise ValueError(f"{route}: bursts.latency_scale must be >= 0")
+        self._lock = threading.Lock()
+        self.reset(seed)
+
+    def reset(self, seed):
+        self._rng = random.Random(f"{seed}:{self.route}")
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """The fault for the next request on this route"""
+        with self._lock:
+            rng = self._rng
+            in_burst = (self.burst_every
+                        and self.requests % self.burst_every >= self.burst_every - self.burst_length)
+            self.requests += 1
+            error_rate = self.burst_error_rate if in_burst else self.error_rate
+            failed = rng.random() < error_rate
+            status_draw = rng.random()
+            delay = self.sample_latency(rng) if self.sample_latency else 0.0
+            if in_burst:
+                delay *= self.burst_latency_scale
+            if self.error_above is not None and delay > self.error_above:
+                failed, delay = True, self.error_above
+            if not failed:
+                return Fault(None, delay)
+            self.errors += 1
+            index = bisect_right(self.cumulative_weights, status_draw * self.cumulative_weights[-1])
+            return Fault(self.statuses[min(index, len(self.statuses) - 1)], delay)
+
+
+def _load_env_profile():
+    value = os.environ.get('FAULT_PROFILE', '').strip()
+    if not value:
+        return {}
+    if not value.startswith('{'):
+        with open(value) as f:
+            value = f.read()
+    return json.loads(value)
+
+
+class FaultInjector:
+    def __init__(self, routes=None, seed=0, sleep=time.sleep):
+        self.sleep = sleep
+        self.seed = seed
+        self._routes = {}
+        self.configure({'routes': routes or {}})
+
+    def configure(self, profile):
+        """Merge a profile ({"seed": ..., "routes": {...}}) and restart all sequences"""
+        seed = profile.get('seed', self.seed)
+        routes = {route: faults.spec for route, faults in self._routes.items()}
+        for route, spec in (profile.get('routes') or {}).items():
+            if spec is None:
+                routes.pop(route, None)
+            else:
+                routes[route] = spec
+        # Compile everything before swapping, so a bad profile changes nothing
+        compiled = {route: RouteFaults(route, spec, seed) for route, spec in routes.items()}
+        self.seed, self._routes = seed, compiled
+
+    def __contains__(self, route):
+        return route in self._routes
+
+    def reset(self):
+        for faults in self._routes.values():
+            faults.reset(self.seed)
+
+    def describe(self):
+        return {
+            'seed': self.seed,
+            'routes': {route: dict(faults.spec, requests=faults.requests, injected_errors=faults.errors)
+                       for route, faults in sorted(self._routes.items())},
+        }
+
+    def apply(self, route):
+        """Draw, sleep and remember (in g.fault) the fault for route
+
+        Returns an error response when the request should fail, else None.
+        """
+        faults = self._routes.get(route)
+        fault = faults.draw() if faults is not None else NO_FAULT
+        g.fault = fault
+        if fault.delay:
+            self.sleep(fault.delay)
+        if fault.status is not None:
+            return jsonify({"message": "Request failed", "fault": "injected"}), fault.status
+        return None
+
+
+def current_fault():
+    """The fault applied to this request (NO_FAULT if none was)"""
+    return g.get('fault', NO_FAULT)
+
+
+def inject_faults(app, defaults=None, sleep=time.sleep, admin_path='/admin/faults'):
+    """Apply fault profiles to app's routes; defaults are overridden by FAULT_PROFILE"""
+    profile = _load_env_profile()
+    routes = dict(defaults or {})
+    routes.update(profile.get('routes') or {})
+    seed = int(os.environ.get('FAULT_SEED', profile.get('seed', 0)))
+    try:
+        # Same checks as PUT /admin/faults, so a bad FAULT_PROFILE fails at startup
+        injector = FaultInjector(routes, seed, sleep)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid fault profile: {e}") from e
+
+    @app.before_request
+    def _inject():
+        rule = request.url_rule
+        if rule is not None and rule.rule in injector:
+            return injector.apply(rule.rule)
+
+    if os.getenv('FAULT_ADMIN', '1').lower() not in ('0', 'false', 'no'):
+        @app.route(admin_path, methods=['GET', 'PUT'])
+        def _fault_profile():
+            if request.method == 'PUT':
+                try:
+                    injector.configure(request.get_json(force=True))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    return jsonify({"error": f"Invalid fault profile: {e}"}), 400
+            return jsonify(injector.describe())
+
+        @app.route(admin_path + '/reset', methods=['POST'])
+        def _reset_faults():
+            injector.reset()
+            return jsonify(injector.describe())
+
+    app.extensions['faults'] = injector
+    return injector
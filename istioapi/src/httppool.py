@@ -0,0 +1,82 @@
+"""
+Shared HTTP client session layer
+
+Wraps requests so callers choose explicitly how connections are handled:
+
+- keep-alive: one pooled requests.Session; HTTP/1.1 connections are reused
+  across calls (and threads), so results reflect steady-state latency.
+- close: every call opens a new TCP (and TLS) connection and sends
+  `Connection: close`, so results include connection setup each time.
+
+Used by clientapp.py and by the tools in lab-istio/tools.
+
+Environment variables (read by HttpPool.from_env):
+    HTTP_CONNECTION_MODE  keep-alive | close      (default: keep-alive)
+    HTTP_POOL_SIZE        max pooled connections  (default: 10, or the caller's)
+"""
+
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+KEEP_ALIVE = 'keep-alive'
+CLOSE = 'close'
+CONNECTION_MODES = (KEEP_ALIVE, CLOSE)
+
+
+class HttpPool:
+    def __init__(self, pool_size=10, connection_mode=KEEP_ALIVE, headers=None):
+        if connection_mode not in CONNECTION_MODES:
+            raise ValueError(f"connection_mode must be one of {', '.join(CONNECTION_MODES)}")
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.pool_size = pool_size
+        self.connection_mode = connection_mode
+        self.headers = dict(headers or {})
+        self.session = None
+        if connection_mode == KEEP_ALIVE:
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+            # pool_maxsize connections are kept open per host; extra
+            # concurrent callers still succeed but their connections are
+            # discarded afterwards, so size this to the expected concurrency
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        else:
+            self.headers['Connection'] = 'close'
+
+    @classmethod
+    def from_env(cls, headers=None, pool_size=10):
+        """Build a pool from HTTP_CONNECTION_MODE / HTTP_POOL_SIZE"""
+        return cls(
+            pool_size=int(os.getenv('HTTP_POOL_SIZE', pool_size)),
+            connection_mode=os.getenv('HTTP_CONNECTION_MODE', KEEP_ALIVE),
+            headers=headers,
+        )
+
+    def request(self, method, url, **kwargs):
+        if self.session is not None:
+            return self.session.request(method, url, **kwargs)
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        # requests.request() builds and closes a throwaway Session, so no
+        # connection is ever reused
+        return requests.request(method, url, headers=headers, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
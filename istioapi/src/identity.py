@@ -0,0 +1,58 @@
+"""
+Backend identity headers shared by the istioapi Flask services
+
+stamp_identity(app, version) adds to every response:
+
+    X-Backend-Version   the service version, e.g. v1 / v2 / v3 for api1v*
+    X-Backend-Pod       the pod (or host) that answered
+    X-Backend-Zone      the zone, only when ZONE is set
+
+so a client can tell which deployment and which replica served each
+request without parsing bodies. resiliencytest.py --backend-header groups
+its results by one of these headers and, with --expected-split, reports
+how far the observed traffic split drifts from the configured weights.
+
+The values are fixed for the life of the process and built once at
+startup; each response only gets two or three headers set.
+
+Environment variables:
+    SERVICE_VERSION   overrides the version passed by the service
+    POD_NAME          pod name, e.g. from the downward API
+                      (default: HOSTNAME, which Kubernetes sets to the pod name)
+    ZONE              zone or locality to report (default: not sent)
+    IDENTITY_HEADERS  set to 0/false to skip the headers (default: enabled)
+"""
+
+import os
+import socket
+
+VERSION_HEADER = 'X-Backend-Version'
+POD_HEADER = 'X-Backend-Pod'
+ZONE_HEADER = 'X-Backend-Zone'
+
+
+def identity(version):
+    """The identity headers for this process as a list of (name, value)"""
+    headers = [
+        (VERSION_HEADER, os.getenv('SERVICE_VERSION', version)),
+        (POD_HEADER, os.getenv('POD_NAME') or os.getenv('HOSTNAME') or socket.gethostname()),
+    ]
+    if os.getenv('ZONE'):
+        headers.append((ZONE_HEADER, os.environ['ZONE']))
+    return headers
+
+
+def stamp_identity(app, version):
+    """Add the backend identity headers to every response of a Flask app"""
+    if os.getenv('IDENTITY_HEADERS', '1').lower() in ('0', 'false', 'no'):
+        return None
+    headers = identity(version)
+
+    @app.after_request
+    def _stamp(response):
+        for name, value in headers:
+            response.headers[name] = value
+        return response
+
+    app.extensions['identity'] = dict(headers)
+    return headers
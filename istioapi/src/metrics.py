@@ -0,0 +1,154 @@
+"""
+Prometheus instrumentation shared by the istioapi Flask services
+
+instrument(app) adds a /metrics endpoint in the Prometheus text exposition
+format with, per route (the URL rule, e.g. /books, so label cardinality
+stays bounded):
+
+    http_server_requests_total{route,method,status}           counter
+    http_server_request_errors_total{route,method}            counter (5xx or unhandled exception)
+    http_server_request_duration_seconds{route,method}        histogram
+    http_server_requests_in_flight{route}                     gauge
+
+Durations cover the time Flask spends in the app (request hooks and view),
+so comparing them with Envoy's istio_request_duration_milliseconds shows
+how much of the latency is added outside the application.
+
+Metrics live in process memory, so serve() runs instrumented apps in a
+single gunicorn worker (with more threads) by default and every scrape sees
+all of the pod's requests. With WORKERS > 1 set explicitly each scrape is
+answered by one worker and reflects only the requests it served.
+
+Per-request cost is two perf_counter() calls, one bisect over the bucket
+bounds and a few dict updates under a lock; see istioapi/bench/metrics_overhead.py.
+
+Environment variables:
+    METRICS_ENABLED   set to 0/false to skip instrumentation (default: enabled)
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _RouteStats:
+    __slots__ = ('bucket_counts', 'count', 'sum', 'errors', 'statuses')
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.statuses = {}
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._in_flight = {}
+
+    def start(self, route):
+        with self._lock:
+            self._in_flight[route] = self._in_flight.get(route, 0) + 1
+
+    def finish(self, route, method, status, duration, error=False):
+        """Record one completed request"""
+        bucket = bisect_left(BUCKETS, duration)
+        with self._lock:
+            self._in_flight[route] -= 1
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = _RouteStats()
+            stats.bucket_counts[bucket] += 1
+            stats.count += 1
+            stats.sum += duration
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if error or status >= 500:
+                stats.errors += 1
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        with self._lock:
+            routes = [(key, stats.bucket_counts[:], stats.count, stats.sum, stats.errors, dict(stats.statuses))
+                      for key, stats in sorted(self._routes.items())]
+            in_flight = sorted(self._in_flight.items())
+
+        lines = ['# HELP http_server_requests_total Completed HTTP requests.',
+                 '# TYPE http_server_requests_total counter']
+        for (route, method), _, _, _, _, statuses in routes:
+            for status, count in sorted(statuses.items()):
+                lines.append(f'http_server_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+        lines += ['# HELP http_server_request_errors_total Requests that ended in a 5xx or an unhandled exception.',
+                  '# TYPE http_server_request_errors_total counter']
+        for (route, method), _, _, _, errors, _ in routes:
+            lines.append(f'http_server_request_errors_total{{route="{route}",method="{method}"}} {errors}')
+
+        lines += ['# HELP http_server_request_duration_seconds Time spent in the application per request.',
+                  '# TYPE http_server_request_duration_seconds histogram']
+        for (route, method), bucket_counts, count, total, _, _ in routes:
+            labels = f'route="{route}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'http_server_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_server_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_server_request_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'http_server_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += ['# HELP http_server_requests_in_flight Requests currently being handled.',
+                  '# TYPE http_server_requests_in_flight gauge']
+        for route, value in in_flight:
+            lines.append(f'http_server_requests_in_flight{{route="{route}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _route():
+    rule = request.url_rule
+    # Unmatched paths (404s) share one label instead of one per URL
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def instrument(app, path='/metrics'):
+    """Add request metrics and a Prometheus scrape endpoint to a Flask app"""
+    if os.getenv('METRICS_ENABLED', '1').lower() in ('0', 'false', 'no'):
+        return None
+    metrics = Metrics()
+
+    @app.before_request
+    def _start_timer():
+        if request.path == path:
+            return
+        g._metrics_route = _route()
+        g._metrics_start = time.perf_counter()
+        metrics.start(g._metrics_route)
+
+    @app.after_request
+    def _capture_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        status = g.pop('_metrics_status', 500)
+        metrics.finish(g.pop('_metrics_route'), request.method, status, duration, error=exc is not None)
+
+    @app.route(path)
+    def _metrics():
+        return Response(metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    app.extensions['metrics'] = metrics
+    return metrics
@@ -0,0 +1,61 @@
+"""
+Pre-serialized JSON responses for static data
+
+The books/authors APIs return the same JSON on every call. ResponseCache
+encodes each body once (with jsonify, so the bytes are identical to what
+the routes used to return), computes a strong ETag for it, and afterwards
+only copies the stored bytes into a new response. A request whose
+If-None-Match matches gets an empty 304 instead.
+
+Usage:
+    cache = ResponseCache()
+
+    @app.route('/books')
+    def get_books():
+        return cache.json('books', lambda: books)
+
+Call cache.invalidate('books') (or cache.invalidate() for everything)
+after changing the underlying data; the next request re-encodes it.
+"""
+
+import hashlib
+import threading
+
+from flask import current_app, jsonify, request
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _build(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                body = jsonify(build()).get_data()
+                etag = hashlib.sha1(body).hexdigest()[:20]
+                entry = self._entries[key] = (body, etag, f'"{etag}"')
+        return entry
+
+    def json(self, key, build):
+        """Cached JSON response for key; build() returns the data on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._build(key, build)
+        body, etag, quoted_etag = entry
+        if_none_match = request.headers.get('If-None-Match')
+        # Fast path for the common exact echo of our ETag, full parsing otherwise
+        if if_none_match and (if_none_match == quoted_etag
+                              or request.if_none_match.contains_weak(etag)):
+            return current_app.response_class(status=304, headers={'ETag': quoted_etag})
+        return current_app.response_class(body, mimetype='application/json',
+                                          headers={'ETag': quoted_etag})
+
+    def invalidate(self, key=None):
+        """Drop one cached body (or all of them) so it is rebuilt on next use"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,137 @@
+"""
+Serving entry point shared by the istioapi Flask services
+
+Every service ends with serve(app) instead of app.run(). The server is
+picked with environment variables so the same image can run the Werkzeug
+development server or a multi-process gunicorn server:
+
+    SERVER              dev | gunicorn                    (default: dev)
+    PORT                listen port                       (default: 5000)
+    WORKERS             gunicorn worker processes         (default: CPUs available
+                        to the container, see available_cpus(); 1 for apps
+                        with per-process state, see below)
+    THREADS             threads per worker (gthread)      (default: 4, or 4 per
+                        CPU with a single default worker)
+    WORKER_CLASS        gunicorn worker class, e.g. sync, gthread, gevent
+                        (default: gthread, or the service's own default)
+    WORKER_CONNECTIONS  open connections per gevent worker (default: 1000)
+    TIMEOUT             gunicorn worker timeout, seconds  (default: 120)
+    KEEPALIVE           keep-alive timeout, seconds       (default: 75); the
+                        sidecar's upstream idle timeout is 1 h unless a
+                        DestinationRule sets connectionPool.http.idleTimeout,
+                        so set that below this value (the lab uses 60s) or
+                        the app closes pooled connections first and Envoy
+                        answers 503 UC
+    FLASK_DEBUG         1 to enable the debugger with SERVER=dev (default: off)
+
+The Dockerfiles set SERVER=gunicorn; running a service directly with
+`python src/api1v1.py` still starts the development server.
+
+Some app extensions keep state in process memory that must be the same
+for every request: /metrics counters (metrics.py) would otherwise differ
+per worker, so each scrape would read a random worker's counters and
+Prometheus would see them jump back as false resets, and a fault profile
+(faults.py) would be changed by PUT /admin/faults only in the worker that
+received it, each worker drawing its own sequence. For such apps
+WORKERS defaults to 1, with the threads of all CPUs in that one process;
+setting WORKERS > 1 anyway prints a warning.
+"""
+
+import math
+import os
+import sys
+
+# cgroup v2, then v1, CPU quota files
+CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CFS_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CFS_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+# app.extensions whose state lives in one process (see above)
+PROCESS_LOCAL_EXTENSIONS = ('metrics', 'faults')
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def _cpu_quota():
+    """The container's CPU limit in cores (e.g. 0.5 for 500m), or None without one"""
+    fields = _read(CPU_MAX)
+    if fields and fields[0] != 'max':
+        return int(fields[0]) / int(fields[1])
+    quota, period = _read(CFS_QUOTA), _read(CFS_PERIOD)
+    if quota and period and int(quota[0]) > 0:
+        return int(quota[0]) / int(period[0])
+    return None
+
+
+def available_cpus():
+    """CPUs this process may use: its CPU affinity, capped by the cgroup quota
+
+    os.cpu_count() is the node's core count; a pod limited to 500m on a
+    32-core node would fork 32 workers and be throttled (and run out of
+    memory), so the limit is rounded up to whole cores instead.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    quota = _cpu_quota()
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def serve(app, port=5000, worker_class='gthread'):
+    """Run app with the server selected by SERVER (blocks)"""
+    server = os.environ.get('SERVER', 'dev')
+    port = _env_int('PORT', port)
+
+    if server == 'dev':
+        debug = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+        app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
+    elif server == 'gunicorn':
+        cpus = available_cpus()
+        local = [name for name in PROCESS_LOCAL_EXTENSIONS if app.extensions.get(name) is not None]
+        workers = _env_int('WORKERS', 1 if local else cpus)
+        if workers > 1 and local:
+            print(f"⚠️  WORKERS={workers}: {', '.join(local)} state is per worker, so each "
+                  f"request sees only the worker that answers it (use WORKERS=1 and more THREADS)",
+                  file=sys.stderr)
+        _run_gunicorn(app, {
+            'bind': f'0.0.0.0:{port}',
+            'workers': workers,
+            'threads': _env_int('THREADS', 4 * cpus if workers == 1 else 4),
+            'worker_class': os.environ.get('WORKER_CLASS', worker_class),
+            'worker_connections': _env_int('WORKER_CONNECTIONS', 1000),
+            'timeout': _env_int('TIMEOUT', 120),
+            'keepalive': _env_int('KEEPALIVE', 75),
+            'accesslog': None,
+            'errorlog': '-',
+        })
+    else:
+        raise SystemExit(f"Unknown SERVER '{server}' (expected dev or gunicorn)")
+
+
+def _run_gunicorn(app, options):
+    # Imported here so the dev server keeps working without gunicorn installed
+    from gunicorn.app.base import BaseApplication
+
+    class _Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    _Application().run()
@@ -1,9 +1,29 @@
 from flask import Flask, jsonify, request
 import time
-import random
 import os
 
+from faults import current_fault, inject_faults
+from identity import stamp_identity
+from metrics import instrument
+from serve import serve
+
+try:
+    # Under gunicorn's gevent worker this is a timer on the event loop, so a
+    # delayed request only parks a greenlet and /fast and /health keep
+    # being served no matter how many slow calls are open
+    from gevent import sleep as delay_response
+except ImportError:
+    from time import sleep as delay_response
+
 app = Flask(__name__)
+instrument(app)
+stamp_identity(app, 'v1')
+# Delays come from the fault profile so they can be reshaped and replayed
+# (see faults.py); these defaults are the original 3-8s and 10-15s
+faults = inject_faults(app, {
+    '/slow': {'latency': {'dist': 'uniform', 'min': 3, 'max': 8}},
+    '/very-slow': {'latency': {'dist': 'uniform', 'min': 10, 'max': 15}},
+}, sleep=delay_response)
 
 @app.route('/health')
 def health():
@@ -23,8 +43,7 @@ def fast_endpoint():
 @app.route('/slow')
 def slow_endpoint():
     """Slow response - 3-8 second delay"""
-    delay = random.uniform(3, 8)
-    time.sleep(delay)
+    delay = current_fault().delay
     return jsonify({
         "message": "Slow response", 
         "delay": f"{delay:.2f}s",
@@ -35,8 +54,7 @@ def slow_endpoint():
 @app.route('/very-slow')
 def very_slow_endpoint():
     """Very slow response - 10-15 second delay"""
-    delay = random.uniform(10, 15)
-    time.sleep(delay)
+    delay = current_fault().delay
     return jsonify({
         "message": "Very slow response", 
         "delay": f"{delay:.2f}s",
@@ -48,15 +66,12 @@ def very_slow_endpoint():
 def timeout_test():
     """Test different timeout scenarios"""
     scenario = request.args.get('scenario', 'fast')
-    
-    if scenario == 'fast':
-        return fast_endpoint()
-    elif scenario == 'slow':
-        return slow_endpoint()
-    elif scenario == 'very-slow':
-        return very_slow_endpoint()
-    else:
+    handlers = {'fast': fast_endpoint, 'slow': slow_endpoint, 'very-slow': very_slow_endpoint}
+    if scenario not in handlers:
         return jsonify({"error": "Unknown scenario"}), 400
+    # Same faults as calling the scenario's own route
+    failed = faults.apply('/' + scenario)
+    return failed or handlers[scenario]()
 
 @app.route('/configurable-delay')
 def configurable_delay():
@@ -68,7 +83,7 @@ def configurable_delay():
         if delay > max_delay:
             delay = max_delay
             
-        time.sleep(delay)
+        delay_response(delay)
         return jsonify({
             "message": f"Response after {delay}s delay",
             "delay": f"{delay:.2f}s",
@@ -90,11 +105,12 @@ def root():
             "/slow", 
             "/very-slow",
             "/timeout-test?scenario=fast|slow|very-slow",
-            "/configurable-delay?delay=<seconds>"
+            "/configurable-delay?delay=<seconds>",
+            "/metrics",
+            "/admin/faults"
         ],
         "timestamp": time.time()
     }), 200
 
 if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    serve(app, worker_class='gevent')
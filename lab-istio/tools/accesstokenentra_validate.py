@@ -2,32 +2,140 @@ import jwt
 import json
 import requests
 import os
+import re
+import sys
+import threading
+import time
 from jwt.algorithms import RSAAlgorithm
 
+# The pooled session layer is shared with the istioapi client images
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'istioapi', 'src'))
+from httppool import HttpPool
+
+# Reuse the connection to login.microsoftonline.com across lookups
+# (HTTP_CONNECTION_MODE=close opens a new one per request instead)
+http = HttpPool.from_env()
+
+DISCOVERY_URL = "https://login.microsoftonline.com/{tenant_id}/v2.0/.well-known/openid-configuration"
+
+# A failed discovery/JWKS fetch: network or HTTP errors, bad JSON, missing fields
+REFRESH_ERRORS = (requests.exceptions.RequestException, ValueError, KeyError)
+
+class KeyNotFoundError(Exception):
+    pass
+
+class JwksKeyStore:
+    """Signing keys from an OpenID Connect discovery document, cached.
+
+    The discovery document and the JWKS are cached for their Cache-Control
+    max-age (or default_ttl when there is none), keys are indexed by kid
+    and parsed into RSA key objects once. A kid that is not in the cache
+    triggers a JWKS refresh (keys get rotated). Refreshes of either kind
+    happen at most once per min_refresh_interval, so a flood of tokens with
+    unknown kids (or a max-age of 0) cannot turn into a flood of requests
+    to the identity provider.
+    """
+
+    def __init__(self, discovery_url, default_ttl=3600, min_refresh_interval=60,
+                 http_client=None, clock=time.monotonic):
+        self.discovery_url = discovery_url
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.http = http_client or http
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._jwks_uri = None
+        self._discovery_expires = 0.0
+        self._jwks = {}         # kid -> JWK dict
+        self._parsed = {}       # kid -> parsed public key
+        self._jwks_expires = 0.0
+        self._last_refresh = None
+        self.fetches = 0
+
+    @classmethod
+    def for_tenant(cls, tenant_id, **kwargs):
+        """Key store for an Entra ID tenant (OPENID_CONFIG_URL overrides the URL)"""
+        url = os.getenv("OPENID_CONFIG_URL") or DISCOVERY_URL.format(tenant_id=tenant_id)
+        return cls(url, **kwargs)
+
+    def _max_age(self, response):
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return int(match.group(1)) if match else self.default_ttl
+
+    def _get(self, url):
+        self.fetches += 1
+        response = self.http.get(url, timeout=10)
+        response.raise_for_status()
+        return response
+
+    def _refresh(self, now):
+        """Re-read the JWKS (and the discovery document if it has expired)"""
+        self._last_refresh = now
+        if self._jwks_uri is None or now >= self._discovery_expires:
+            response = self._get(self.discovery_url)
+            self._jwks_uri = response.json()["jwks_uri"]
+            self._discovery_expires = now + self._max_age(response)
+
+        response = self._get(self._jwks_uri)
+        jwks = {key["kid"]: key for key in response.json()["keys"] if "kid" in key}
+        # Keep parsed keys whose JWK did not change
+        self._parsed = {kid: key for kid, key in self._parsed.items() if jwks.get(kid) == self._jwks.get(kid)}
+        self._jwks = jwks
+        self._jwks_expires = now + self._max_age(response)
+
+    def _can_refresh(self, now):
+        return self._last_refresh is None or now - self._last_refresh >= self.min_refresh_interval
+
+    def get_key(self, kid):
+        """Parsed public key for kid; raises KeyNotFoundError"""
+        with self._lock:
+            now = self.clock()
+            if now >= self._jwks_expires and self._can_refresh(now):
+                try:
+                    self._refresh(now)
+                except REFRESH_ERRORS:
+                    # Keep serving the keys we have; retry after min_refresh_interval
+                    if not self._jwks:
+                        raise
+            if kid not in self._jwks and self._can_refresh(now):
+                try:
+                    self._refresh(now)
+                except REFRESH_ERRORS as e:
+                    # The cached keys stay; only this kid is unknown
+                    raise KeyNotFoundError(f"Public key not found: {kid} (JWKS refresh failed: {e})")
+
+            key = self._parsed.get(kid)
+            if key is None:
+                jwk = self._jwks.get(kid)
+                if jwk is None:
+                    raise KeyNotFoundError(f"Public key not found: {kid}")
+                key = self._parsed[kid] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+            return key
+
+_key_stores = {}
+
+def get_key_store(tenant_id):
+    """Process-wide JwksKeyStore for a tenant"""
+    store = _key_stores.get(tenant_id)
+    if store is None:
+        store = _key_stores[tenant_id] = JwksKeyStore.for_tenant(tenant_id)
+    return store
+
 def get_public_key(tenant_id, kid):
-    # Fetch the OpenID Connect discovery document
-    discovery_url = f"https://login.microsoftonline.com/{tenant_id}/v2.0/.well-known/openid-configuration"
-    response = requests.get(discovery_url)
-    jwks_uri = response.json()["jwks_uri"]
-
-    # Fetch the public keys
-    response = requests.get(jwks_uri)
-    keys = response.json()["keys"]
-
-    # Find the key with the matching kid
-    for key in keys:
-        if key["kid"] == kid:
-            return RSAAlgorithm.from_jwk(json.dumps(key))
-    raise Exception("Public key not found")
-
-def decode_and_verify_access_token(token, tenant_id):
+    return get_key_store(tenant_id).get_key(kid)
+
+def decode_and_verify_access_token(token, tenant_id, key_store=None):
     try:
         # Decode the token header to get the kid
         unverified_header = jwt.get_unverified_header(token)
         kid = unverified_header["kid"]
 
-        # Get the public key
-        public_key = get_public_key(tenant_id, kid)
+        # Get the public key (cached across calls)
+        key_store = key_store or get_key_store(tenant_id)
+        public_key = key_store.get_key(kid)
 
         # Decode and verify the token without audience check
         decoded_token = jwt.decode(token, public_key, algorithms=["RS256"])
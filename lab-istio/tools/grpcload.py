@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+gRPC load mode for resiliencytest.py
+
+Calls greeting.Greeter/SayHello (istiogrpc/server/pb/greeting.proto) instead
+of HTTP GETs when --endpoint starts with grpc:// (or grpcs:// for TLS):
+
+    python3 resiliencytest.py --endpoint grpc://greeter.grpc-lab.svc.cluster.local:50051 \\
+        --requests 5000 --concurrency 20 --channels 4
+
+Calls are spread round-robin over --channels channels, each its own HTTP/2
+connection, with up to --concurrency calls in flight. Each reply names the
+pod that answered (hostname, else server_ip), which is how the per-backend
+distribution in the summary is built. That distribution shows the difference
+between per-connection balancing (one channel pins every call to one pod
+unless the sidecar balances per request) and per-request balancing. Use
+--lb-policy round_robin to let the gRPC library balance across the resolved
+addresses itself.
+
+Statuses are recorded under the HTTP code gRPC maps them to (OK -> 200,
+UNAVAILABLE -> 503, DEADLINE_EXCEEDED -> 504, ...), so the usual summary,
+time series and JSON output apply unchanged.
+
+A stand-in server for local runs, without Kubernetes:
+
+    python3 grpcload.py serve --port 50051 --hostname backend-a
+    python3 grpcload.py serve --port 50052 --hostname backend-b --delay 5 --error-rate 0.1
+    python3 resiliencytest.py --endpoint grpc://ipv4:127.0.0.1:50051,127.0.0.1:50052 \\
+        --lb-policy round_robin --requests 2000 --concurrency 10
+
+Requirements:
+    - pip3 install grpcio (no generated stubs are needed: the two messages
+      are encoded by hand below)
+"""
+
+import argparse
+import itertools
+import random
+import socket
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+from resiliencytest import ResiliencyTester
+
+METHOD = '/greeting.Greeter/SayHello'
+# HelloReply field numbers -> names
+REPLY_FIELDS = {1: 'message', 2: 'server_ip', 3: 'hostname', 4: 'timestamp'}
+
+# gRPC status -> HTTP status, as in the gRPC HTTP mapping Envoy uses
+HTTP_STATUS = {
+    grpc.StatusCode.OK: 200,
+    grpc.StatusCode.CANCELLED: 499,
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+    grpc.StatusCode.DEADLINE_EXCEEDED: 504,
+    grpc.StatusCode.NOT_FOUND: 404,
+    grpc.StatusCode.ALREADY_EXISTS: 409,
+    grpc.StatusCode.PERMISSION_DENIED: 403,
+    grpc.StatusCode.RESOURCE_EXHAUSTED: 429,
+    grpc.StatusCode.FAILED_PRECONDITION: 400,
+    grpc.StatusCode.ABORTED: 409,
+    grpc.StatusCode.OUT_OF_RANGE: 400,
+    grpc.StatusCode.UNIMPLEMENTED: 501,
+    grpc.StatusCode.UNAVAILABLE: 503,
+    grpc.StatusCode.UNAUTHENTICATED: 401,
+}
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _string_field(number, text):
+    data = text.encode()
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def encode_hello_request(name):
+    """Serialized HelloRequest{name}"""
+    return _string_field(1, name) if name else b''
+
+
+def decode_hello_reply(data):
+    """HelloReply as a dict of its string fields"""
+    return {REPLY_FIELDS[number]: text for number, text in _string_fields(data).items()
+            if number in REPLY_FIELDS}
+
+
+def _string_fields(data):
+    """{field number: text} for the length-delimited fields of a message; others are skipped"""
+    fields, position = {}, 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 2:
+            length, position = _read_varint(data, position)
+            fields[number] = data[position:position + length].decode(errors='replace')
+            position += length
+        elif wire_type == 0:
+            _, position = _read_varint(data, position)
+        elif wire_type in (1, 5):
+            position += 8 if wire_type == 1 else 4
+        else:
+            raise ValueError(f"unsupported protobuf wire type {wire_type}")
+        if position > len(data):
+            raise ValueError(f"truncated protobuf field {number}")
+    return fields
+
+
+def _read_varint(data, position):
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("truncated protobuf varint")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _channel(target, secure, lb_policy):
+    # A local subchannel pool stops grpc from sharing one connection
+    # between channels to the same target
+    options = [('grpc.use_local_subchannel_pool', 1), ('grpc.lb_policy_name', lb_policy)]
+    if secure:
+        return grpc.secure_channel(target, grpc.ssl_channel_credentials(), options=options)
+    return grpc.insecure_channel(target, options=options)
+
+
+class GrpcLoadTester(ResiliencyTester):
+    """ResiliencyTester whose requests are SayHello calls"""
+
+    def __init__(self, endpoint_url, timeout=10, concurrency=1, precision=0.01,
+                 channels=1, lb_policy='pick_first', name='resiliencytest', verbose=True,
+                 expected_split=None, skew_tolerance=5.0):
+        # The backend comes from the reply, not from a response header
+        super().__init__(endpoint_url, timeout, concurrency, precision, verbose=verbose,
+                         backend_header=None, expected_split=expected_split,
+                         skew_tolerance=skew_tolerance)
+        secure = endpoint_url.startswith('grpcs://')
+        target = endpoint_url.split('://', 1)[1]
+        self.connection_mode = f"gRPC, {channels} channel(s), {lb_policy}"
+        self.channels = [_channel(target, secure, lb_policy) for _ in range(max(1, channels))]
+        # Raw bytes in and out; the messages are (de)serialized here
+        self._calls = [channel.unary_unary(METHOD) for channel in self.channels]
+        self._next_call = itertools.count()
+        self._request = encode_hello_request(name)
+
+    def make_request(self, intended_start=None):
+        """One SayHello call, recorded like an HTTP request"""
+        call = self._calls[next(self._next_call) % len(self._calls)]
+        start_time = time.time()
+        if intended_start is not None and self.monitor is not None:
+            self.monitor.record_dispatch(start_time - intended_start)
+        try:
+            reply = decode_hello_reply(call(self._request, timeout=self.timeout))
+            code, error = grpc.StatusCode.OK, None
+            backend = reply.get('hostname') or reply.get('server_ip') or None
+        except grpc.RpcError as e:
+            code, backend = e.code(), None
+            error = f"gRPC {code.name}: {e.details()}"
+        except ValueError as e:
+            # A malformed or truncated reply is a failed call, not a crash
+            code, backend = grpc.StatusCode.INTERNAL, None
+            error = f"gRPC reply not decodable: {e}"
+        end_time = time.time()
+        response_time = end_time - start_time
+        corrected_time = end_time - intended_start if intended_start is not None else None
+        status = HTTP_STATUS.get(code, 500)
+        success = code == grpc.StatusCode.OK
+        self._record(response_time, status, error, timeout=code == grpc.StatusCode.DEADLINE_EXCEEDED,
+                     corrected_time=corrected_time, success=success, backend=backend)
+        if not success:
+            # HTTP errors are only counted by status; keep gRPC's detail too
+            with self._lock:
+                self.results['errors'][error] += 1
+        return success, response_time, status, error
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+        super().close()
+
+
+def serve(port, hostname, delay_ms=0.0, error_rate=0.0, threads=32):
+    """Run a stand-in Greeter server (blocks)"""
+    rng = random.Random()
+
+    def say_hello(request, context):
+        name = _string_fields(request).get(1, '')
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        if error_rate and rng.random() < error_rate:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "injected failure")
+        return (_string_field(1, f"Hello {name}!") + _string_field(2, '127.0.0.1')
+                + _string_field(3, hostname)
+                + _string_field(4, time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())))
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=threads))
+    handler = grpc.method_handlers_generic_handler('greeting.Greeter', {
+        'SayHello': grpc.unary_unary_rpc_method_handler(say_hello),
+    })
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    print(f"🚀 Stand-in Greeter '{hostname}' listening on :{port}")
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop(grace=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in greeting.Greeter server for gRPC load tests')
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--port', type=int, default=50051,
+                        help='Listen port (default: 50051)')
+    parser.add_argument('--hostname', default=socket.gethostname(),
+                        help='Backend name returned in replies (default: this host)')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Milliseconds to wait before replying (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of calls failed with UNAVAILABLE (default: 0)')
+    args = parser.parse_args()
+    if not 0 <= args.error_rate <= 1:
+        print("❌ Error: --error-rate must be between 0 and 1")
+        sys.exit(1)
+    serve(args.port, args.hostname, args.delay, args.error_rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Fixed-memory latency histogram
+
+Latencies are counted in logarithmically sized buckets, so the memory used
+does not grow with the number of requests and any percentile can be read
+back with a bounded relative error (the precision). Count, sum, min and max
+are tracked exactly. Histograms with the same configuration can be merged,
+which is how results from several workers or runs are combined.
+
+Usage:
+    from latencyhistogram import LatencyHistogram
+
+    hist = LatencyHistogram(precision=0.01)   # +/- 1% per recorded value
+    hist.record(0.042)
+    hist.percentile(99)
+"""
+
+import math
+
+
+class LatencyHistogram:
+    def __init__(self, precision=0.01, lowest=1e-6, highest=3600.0):
+        """Track latencies (seconds) between lowest and highest.
+
+        precision is the relative error of a reported value, e.g. 0.01
+        means a percentile is within 1% of the true latency. Values outside
+        [lowest, highest] are clamped into the first or last bucket; min
+        and max are still exact.
+        """
+        if not 0 < precision < 1:
+            raise ValueError("precision must be between 0 and 1")
+        if not 0 < lowest < highest:
+            raise ValueError("lowest must be positive and smaller than highest")
+        self.precision = precision
+        self.lowest = lowest
+        self.highest = highest
+        # Each bucket covers [lowest * gamma^i, lowest * gamma^(i+1)); its
+        # midpoint is within `precision` of every value in the bucket
+        self._gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        self._num_buckets = int(math.ceil(math.log(highest / lowest) / self._log_gamma)) + 1
+        self.counts = [0] * self._num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def __len__(self):
+        return self.count
+
+    def _bucket_index(self, value):
+        if value <= self.lowest:
+            return 0
+        index = int(math.log(value / self.lowest) / self._log_gamma)
+        return min(index, self._num_buckets - 1)
+
+    def _bucket_value(self, index):
+        """Representative value of a bucket (its geometric midpoint)"""
+        return self.lowest * self._gamma ** index * 2 * self._gamma / (self._gamma + 1)
+
+    def record(self, value, count=1):
+        """Add a latency (seconds) to the histogram"""
+        self.counts[self._bucket_index(value)] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Latency at the given percentile (0-100), or 0.0 if empty"""
+        if not self.count:
+            return 0.0
+        # Same nearest-rank convention as sorted_times[int(n * p)]
+        rank = min(int(self.count * percent / 100.0), self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen > rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def percentiles(self, percents=(50, 90, 95, 99, 99.9)):
+        """Several percentiles in one pass, as {percent: latency}"""
+        result = {}
+        if not self.count:
+            return {p: 0.0 for p in percents}
+        ranks = sorted((min(int(self.count * p / 100.0), self.count - 1), p) for p in percents)
+        seen = 0
+        pending = iter(ranks)
+        rank, percent = next(pending)
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            while seen > rank:
+                result[percent] = min(max(self._bucket_value(index), self.min), self.max)
+                try:
+                    rank, percent = next(pending)
+                except StopIteration:
+                    return result
+        return result
+
+    def _check_compatible(self, other):
+        if (self.precision, self.lowest, self.highest) != (other.precision, other.lowest, other.highest):
+            raise ValueError("cannot merge histograms with different precision or range")
+
+    def merge(self, other):
+        """Add all values recorded in another histogram into this one"""
+        self._check_compatible(other)
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def to_dict(self):
+        """JSON-friendly snapshot; only non-empty buckets are stored"""
+        summary = {f"p{p:g}": v for p, v in self.percentiles().items()}
+        summary.update({'mean': self.mean, 'min': self.min, 'max': self.max})
+        return {
+            'precision': self.precision,
+            'lowest': self.lowest,
+            'highest': self.highest,
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'summary': summary,
+            'buckets': [[i, c] for i, c in enumerate(self.counts) if c],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a histogram saved with to_dict()"""
+        hist = cls(data['precision'], data['lowest'], data['highest'])
+        for index, bucket_count in data['buckets']:
+            hist.counts[index] = bucket_count
+        hist.count = data['count']
+        hist.total = data['sum']
+        hist.min = data['min']
+        hist.max = data['max']
+        return hist
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Distributed load runner for resiliencytest.py
+
+A single resiliencytest.py process is limited by the GIL and by one pod's
+network path. In a distributed run several workers each drive a share of
+the load and stream their results (histogram snapshots and status-code /
+error counters) to a coordinator, which merges them into one summary and
+one JSON report.
+
+Local (several processes on one machine):
+    python3 resiliencytest.py --workers 4 --requests 10000 --concurrency 10
+
+Across pods (start the coordinator first, then the workers):
+    python3 resiliencytest.py --listen 7000 --expect 3 --output merged.json
+    python3 resiliencytest.py --report-to coordinator:7000 --requests 3000 --rate 100
+
+Workers send one JSON object per line over TCP:
+    {"worker": "<id>", "final": false, "snapshot": {...}}
+Snapshots are cumulative, so the coordinator only keeps the latest one per
+worker; the last message of each worker has "final": true.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from resiliencytest import ResiliencyTester, save_results
+
+# How often workers report and the coordinator prints progress
+REPORT_INTERVAL = 1.0
+
+
+class WorkerReporter:
+    def __init__(self, address, worker_id, tester, interval=REPORT_INTERVAL):
+        host, _, port = address.rpartition(':')
+        self.worker_id = worker_id
+        self.tester = tester
+        self.interval = interval
+        self._sock = socket.create_connection((host, int(port)), timeout=10)
+        self._send_lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _send(self, final):
+        message = {'worker': self.worker_id, 'final': final, 'snapshot': self.tester.snapshot()}
+        with self._send_lock:
+            self._sock.sendall(json.dumps(message).encode() + b'\n')
+
+    def _loop(self):
+        while not self._done.wait(self.interval):
+            if self.tester.start_test_time:
+                self._send(final=False)
+
+    def start(self):
+        self._thread.start()
+
+    def finish(self):
+        """Send the final snapshot and close the connection"""
+        self._done.set()
+        self._thread.join()
+        self._send(final=True)
+        self._sock.close()
+
+
+def run_worker(tester, args):
+    """Run one share of a distributed test and stream it to the coordinator"""
+    reporter = WorkerReporter(args.report_to, args.worker_id, tester)
+    print(f"🛰️  Worker {args.worker_id} reporting to {args.report_to}")
+    reporter.start()
+    try:
+        results = tester.run_test(args.requests, args.delay, args.rate)
+    finally:
+        reporter.finish()
+    print(f"✅ Worker {args.worker_id} sent {results['total_requests']} results "
+          f"in {tester.test_duration:.2f}s")
+    return results
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port, host='0.0.0.0'):
+        self.latest = {}
+        self.finished = set()
+        self.lock = threading.Lock()
+        super().__init__((host, port), _ReportHandler)
+
+    def update(self, message):
+        with self.lock:
+            self.latest[message['worker']] = message['snapshot']
+            if message['final']:
+                self.finished.add(message['worker'])
+
+    def snapshots(self):
+        with self.lock:
+            return list(self.latest.values())
+
+
+class _ReportHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.server.update(json.loads(line))
+
+
+def _worker_command(args, index, port):
+    """resiliencytest.py command line for local worker `index` of args.workers"""
+    share, extra = divmod(args.requests, args.workers)
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resiliencytest.py'),
+        '--endpoint', args.endpoint,
+        '--requests', str(share + (1 if index < extra else 0)),
+        '--timeout', str(args.timeout),
+        '--delay', str(args.delay),
+        '--precision', str(args.precision),
+        '--connection', args.connection,
+        '--backend-header', args.backend_header,
+        '--report-to', f'127.0.0.1:{port}',
+        '--worker-id', f'local-{index}',
+    ]
+    if args.rate:
+        command += ['--rate', str(args.rate / args.workers)]
+    # Without --concurrency each worker picks its own default (which for
+    # --rate depends on that worker's share of the rate)
+    if args.concurrency:
+        command += ['--concurrency', str(args.concurrency)]
+    if args.pool_size:
+        command += ['--pool-size', str(args.pool_size)]
+    if args.scenario:
+        command += ['--scenario', os.path.abspath(args.scenario)]
+    if args.profile:
+        command += ['--profile', os.path.abspath(f'{args.profile}.local-{index}'),
+                    '--profile-interval', str(args.profile_interval)]
+    if args.endpoint.startswith(('grpc://', 'grpcs://')):
+        command += ['--channels', str(args.channels), '--lb-policy', args.lb_policy]
+    return command
+
+
+def run_coordinator(args):
+    """Collect and merge worker results, spawning local workers if asked"""
+    expected = args.workers or args.expect
+    coordinator = Coordinator(args.listen or 0)
+    port = coordinator.server_address[1]
+    threading.Thread(target=coordinator.serve_forever, daemon=True).start()
+
+    print(f"🚀 Coordinating {expected} workers against: {args.endpoint}")
+    processes = []
+    if args.workers:
+        processes = [subprocess.Popen(_worker_command(args, i, port), stdout=subprocess.DEVNULL)
+                     for i in range(args.workers)]
+    else:
+        print(f"📡 Waiting for workers on port {port}")
+    print("-" * 80)
+
+    # Only formats progress and the summary; the workers send the requests
+    tester = ResiliencyTester(args.endpoint, args.timeout, 1, args.precision / 100.0,
+                              args.connection, args.pool_size, verbose=False,
+                              backend_header=args.backend_header or None,
+                              expected_split=args.expected_split, skew_tolerance=args.skew_tolerance)
+    start = time.time()
+    try:
+        while len(coordinator.finished) < expected:
+            time.sleep(REPORT_INTERVAL)
+            if processes and all(p.poll() is not None for p in processes):
+                # Give the last final reports a moment to arrive
+                time.sleep(REPORT_INTERVAL)
+                break
+            snapshots = coordinator.snapshots()
+            completed = sum(s['total_requests'] for s in snapshots)
+            successful = sum(s['successful_requests'] for s in snapshots)
+            backend_counts = {}
+            for snapshot in snapshots:
+                for name, stats in snapshot.get('backends', {}).items():
+                    backend_counts[name] = backend_counts.get(name, 0) + stats['total_requests']
+            if completed:
+                print(f"Progress: {completed:6d} requests from {len(snapshots)}/{expected} workers | "
+                      f"Success Rate: {successful / completed * 100:5.1f}% | "
+                      f"Throughput: {completed / (time.time() - start):7.1f} req/s"
+                      + tester.format_split(backend_counts))
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        coordinator.shutdown()
+        coordinator.server_close()
+
+    missing = expected - len(coordinator.finished)
+    if missing:
+        print(f"⚠️  {missing} worker(s) did not send a final report; merging what was received")
+
+    snapshots = coordinator.snapshots()
+    if not snapshots:
+        print("❌ Error: no worker reported any results")
+        sys.exit(1)
+
+    # Present the merged run as one tester so the usual summary applies
+    tester.concurrency = sum(s['concurrency'] for s in snapshots)
+    tester.rate = args.rate
+    tester.results = ResiliencyTester.merge_snapshots(snapshots)
+    # Workers run side by side, so the slowest one bounds the test duration
+    test_duration = max(s['elapsed'] for s in snapshots)
+    tester.print_summary(test_duration)
+
+    if args.output:
+        save_results(tester.results, args.output, {
+            'endpoint': args.endpoint,
+            'requests': args.requests,
+            'timeout': args.timeout,
+            'delay': args.delay,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'precision': args.precision,
+            'connection': args.connection,
+            'scenario': args.scenario,
+            'backend_header': args.backend_header,
+            'expected_split': args.expected_split,
+            'workers': sorted(coordinator.latest),
+            'test_duration': test_duration,
+        }, args.compact)
+        print(f"\n💾 Results saved to: {args.output}")
+    return tester.results
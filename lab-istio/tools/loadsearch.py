@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Adaptive load search for resiliencytest.py
+
+Finds the highest request rate an endpoint sustains within an SLO. Each
+step is an open-loop run (--rate) of a fresh ResiliencyTester, so queueing
+is charged to the requests through the corrected latency, and the step
+passes when that latency percentile and the success rate meet the SLO.
+
+- ramp:   start, start + step, start + 2*step, ... until a step fails
+- binary: double from start until a step fails, then bisect between the
+          last passing and the first failing rate until they are within
+          --search-tolerance percent
+
+Besides the best passing rate the summary reports the knee of the
+rate/latency curve: the measured step furthest below the straight line
+from the first to the last step, where latency starts climbing steeply.
+
+Usage:
+    python3 resiliencytest.py --search ramp --start-rate 20 --rate-step 20 \\
+        --slo-latency 200 --slo-success 99.9
+    python3 resiliencytest.py --search binary --start-rate 50 --max-rate 5000 \\
+        --slo-latency 200 --step-duration 15 --output search.json
+"""
+
+import json
+import math
+import time
+from datetime import datetime
+
+from resiliencytest import build_tester
+
+# Pause between steps so requests still queued from one step don't
+# overlap with the next
+STEP_PAUSE = 1.0
+
+
+def run_step(args, rate, scenario=None):
+    """One open-loop run at rate for --step-duration seconds; returns a step dict"""
+    concurrency = args.concurrency or min(1000, math.ceil(rate * args.timeout))
+    tester = build_tester(args, concurrency, verbose=False, scenario=scenario)
+    num_requests = max(1, int(rate * args.step_duration))
+    results = tester.run_test(num_requests, 0, rate)
+
+    total = results['total_requests']
+    latencies = results['corrected_response_times']
+    success = results['successful_requests'] / total * 100 if total else 0.0
+    latency = latencies.percentile(args.slo_percentile) * 1000 if total else float('inf')
+    passed = success >= args.slo_success and (args.slo_latency is None or latency <= args.slo_latency)
+    return {
+        'rate': rate,
+        'throughput': total / tester.test_duration if tester.test_duration else 0.0,
+        'requests': total,
+        'success_rate': success,
+        'latency_ms': latency,
+        'p50_ms': latencies.percentile(50) * 1000 if total else None,
+        'timeouts': results['timeouts'],
+        'passed': passed,
+        # The step measured the tester rather than the service
+        'generator_bound': results.get('generator', {}).get('unreliable', False),
+    }
+
+
+def _print_step(args, step):
+    print(f"{'✅' if step['passed'] else '❌'} {step['rate']:9.1f} req/s offered | "
+          f"{step['throughput']:9.1f} req/s achieved | "
+          f"Success: {step['success_rate']:6.2f}% | "
+          f"P{args.slo_percentile:g}: {step['latency_ms']:9.1f} ms"
+          + (" | ⚠️  tester-bound" if step['generator_bound'] else ""))
+
+
+def find_knee(steps):
+    """Step where latency starts to climb steeply (None with fewer than 3 steps)"""
+    points = sorted((s for s in steps if math.isfinite(s['latency_ms'])), key=lambda s: s['rate'])
+    if len(points) < 3:
+        return None
+    x0, x1 = points[0]['rate'], points[-1]['rate']
+    y0, y1 = points[0]['latency_ms'], points[-1]['latency_ms']
+    if x1 == x0 or y1 <= y0:
+        return None
+    # Normalise both axes, then take the point furthest below the chord
+    def gap(step):
+        x = (step['rate'] - x0) / (x1 - x0)
+        y = (step['latency_ms'] - y0) / (y1 - y0)
+        return x - y
+    knee = max(points[1:-1], key=gap)
+    return knee if gap(knee) > 0 else None
+
+
+def search(args, scenario=None):
+    """Run the ramp or binary search; returns (steps, best passing step or None)"""
+    steps = []
+
+    def step(rate):
+        result = run_step(args, rate, scenario)
+        steps.append(result)
+        _print_step(args, result)
+        time.sleep(STEP_PAUSE)
+        return result
+
+    best, rate = None, args.start_rate
+    if args.search == 'ramp':
+        while rate <= args.max_rate:
+            result = step(rate)
+            if not result['passed']:
+                break
+            best = result
+            rate += args.rate_step
+        return steps, best
+
+    # binary: grow geometrically to bracket the limit, then bisect
+    failed_rate = None
+    while rate <= args.max_rate:
+        result = step(rate)
+        if not result['passed']:
+            failed_rate = rate
+            break
+        best = result
+        if rate == args.max_rate:
+            break
+        rate = min(rate * 2, args.max_rate)
+    if failed_rate is None or best is None:
+        return steps, best
+    low, high = best['rate'], failed_rate
+    while (high - low) / low * 100 > args.search_tolerance:
+        result = step((low + high) / 2)
+        if result['passed']:
+            best, low = result, result['rate']
+        else:
+            high = result['rate']
+    return steps, best
+
+
+def _json_step(step):
+    """step with non-finite numbers (latency of a step with no requests) as None"""
+    return {key: None if isinstance(value, float) and not math.isfinite(value) else value
+            for key, value in step.items()}
+
+
+def run_search(args, scenario=None):
+    """Entry point for --search; prints the summary and optionally saves JSON"""
+    slo = [f"success >= {args.slo_success:g}%"]
+    if args.slo_latency is not None:
+        slo.insert(0, f"P{args.slo_percentile:g} <= {args.slo_latency:g} ms")
+    print(f"🔎 Searching the maximum sustainable rate for: {args.endpoint}")
+    print(f"🎯 SLO: {' and '.join(slo)} (latency from intended send time)")
+    print(f"📊 {args.search} search from {args.start_rate:g} to {args.max_rate:g} req/s, "
+          f"{args.step_duration:g}s per step")
+    print("-" * 80)
+
+    steps, best = search(args, scenario)
+    knee = find_knee(steps)
+
+    print("\n" + "=" * 80)
+    print("📈 LOAD SEARCH RESULTS")
+    print("=" * 80)
+    print(f"   • Steps run: {len(steps)}")
+    if best:
+        print(f"   • Max sustainable rate: {best['rate']:.1f} req/s "
+              f"(P{args.slo_percentile:g} {best['latency_ms']:.1f} ms, "
+              f"success {best['success_rate']:.2f}%)")
+        if best['rate'] >= args.max_rate:
+            print("   ⚠️  Reached --max-rate without breaking the SLO; raise it to find the limit")
+    else:
+        print(f"   ❌ Even {args.start_rate:g} req/s breaks the SLO; lower --start-rate")
+    if any(step['generator_bound'] for step in steps):
+        bound = min(step['rate'] for step in steps if step['generator_bound'])
+        print(f"   ⚠️  The tester was saturated from {bound:.1f} req/s; steps from there on "
+              f"measure the tester, use --workers or more pods")
+    if knee:
+        print(f"   • Latency knee: ~{knee['rate']:.1f} req/s "
+              f"(P{args.slo_percentile:g} {knee['latency_ms']:.1f} ms)")
+    print("=" * 80)
+
+    if args.output:
+        report = {
+            'endpoint': args.endpoint,
+            'scenario': args.scenario,
+            'search': args.search,
+            'slo': {'percentile': args.slo_percentile, 'latency_ms': args.slo_latency,
+                    'success_rate': args.slo_success},
+            'step_duration': args.step_duration,
+            # inf is not JSON; strict readers reject the Infinity json.dump writes
+            'steps': [_json_step(step) for step in steps],
+            'max_sustainable_rate': best['rate'] if best else None,
+            'knee_rate': knee['rate'] if knee else None,
+            'timestamp': datetime.now().isoformat(),
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str, allow_nan=False)
+        print(f"\n💾 Results saved to: {args.output}")
+    return steps, best
@@ -7,9 +7,21 @@ to services and measuring success rates, response times, and failure patterns.
 
 Usage:
     python3 resiliencytest.py [--endpoint URL] [--requests COUNT] [--timeout SECONDS]
+                              [--concurrency N] [--rate REQS_PER_SEC] [--precision PCT]
+                              [--connection keep-alive|close] [--pool-size N]
+                              [--workers N | --listen PORT --expect N | --report-to HOST:PORT]
+                              [--timeseries FILE [--interval SECONDS]]
+                              [--search ramp|binary --slo-latency MS --slo-success PCT]
+                              [--scenario FILE] [--output FILE [--compact]]
+                              [--endpoint grpc://HOST:PORT [--channels N] [--lb-policy round_robin]]
+                              [--backend-header NAME] [--expected-split v1=90,v2=10 [--skew-tolerance PTS]]
+                              [--profile FILE [--profile-interval MS]]
+    python3 resiliencytest.py compare RESULTS RESULTS [RESULTS...]
 
 Requirements:
     - requests library: pip3 install requests
+    - istioapi/src/httppool.py from this repository (found automatically)
+    - grpcio, for grpc:// endpoints only: pip3 install grpcio
 """
 
 import requests
@@ -18,96 +30,487 @@ import json
 import sys
 import argparse
 import os
-from collections import defaultdict
+import math
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import resultsfile
+from latencyhistogram import LatencyHistogram
+from selfprofile import MIN_DRIFT_SAMPLES, MIN_LAG_SAMPLES, GeneratorMonitor, merge_summaries
+from trafficsplit import BACKEND_HEADER, parse_split, split_skew
+
+# The pooled session layer is shared with the istioapi client images
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'istioapi', 'src'))
+from httppool import HttpPool, CONNECTION_MODES, KEEP_ALIVE
+
+GRPC_SCHEMES = ('grpc://', 'grpcs://')
+
+# Result sections broken down by a key, each with the same per-key counters
+BREAKDOWNS = ('routes', 'backends')
+
 class ResiliencyTester:
-    def __init__(self, endpoint_url, timeout=10):
+    def __init__(self, endpoint_url, timeout=10, concurrency=1, precision=0.01,
+                 connection_mode=KEEP_ALIVE, pool_size=None, verbose=True, scenario=None,
+                 backend_header=BACKEND_HEADER, expected_split=None, skew_tolerance=5.0):
         self.endpoint_url = endpoint_url
+        # Optional scenario.Scenario: a weighted mix of routes instead of
+        # GET endpoint_url, with results also kept per route
+        self.scenario = scenario
         self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.precision = precision
+        # Workers of a distributed run stay quiet and report to the coordinator
+        self.verbose = verbose
+        self.start_test_time = None
+        # Optional timeseries.WindowedMetrics fed alongside self.results
+        self.windows = None
+        # Watches the tester's own CPU, scheduling lag and send drift so a
+        # client-bound run is flagged (None turns it off)
+        self.monitor = GeneratorMonitor()
+        # Responses are grouped per backend by this header (None: not at all),
+        # and the shares compared with expected_split ({backend: weight})
+        self.backend_header = backend_header
+        self.expected_split = expected_split
+        self.skew_tolerance = skew_tolerance
+        self.connection_mode = connection_mode
+        # One pooled connection per worker unless told otherwise
+        self.http = HttpPool(pool_size or self.concurrency, connection_mode,
+                             headers={'User-Agent': 'Istio-Resiliency-Tester/1.0'})
+        self.rate = None
+        # Guards self.results when several worker threads record at once
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
         self.results = {
             'total_requests': 0,
             'successful_requests': 0,
             'failed_requests': 0,
             'timeouts': 0,
-            'response_times': [],
+            # Fixed-memory histograms instead of one list entry per request
+            'response_times': LatencyHistogram(precision),
+            # Latency measured from the intended send time (open-loop --rate mode only)
+            'corrected_response_times': LatencyHistogram(precision),
+            'status_codes': defaultdict(int),
+            # Error message -> count, so long runs and merged runs stay small
+            'errors': defaultdict(int),
+            # Route name -> per-route counters (scenario runs only)
+            'routes': {},
+            # Backend (pod/hostname that answered) -> the same counters,
+            # when the protocol reports one
+            'backends': {}
+        }
+
+    def _new_group_stats(self):
+        return {
+            'total_requests': 0,
+            'successful_requests': 0,
+            'timeouts': 0,
+            'response_times': LatencyHistogram(self.precision),
             'status_codes': defaultdict(int),
-            'errors': []
         }
     
-    def make_request(self):
-        """Make a single HTTP request and record the result"""
+    def _record(self, response_time, status_code=0, error=None, timeout=False,
+                corrected_time=None, route=None, success=None, backend=None):
+        """Fold one request outcome into self.results (thread-safe)"""
+        if success is None:
+            success = status_code == 200
+        with self._lock:
+            self.results['total_requests'] += 1
+            self.results['response_times'].record(response_time)
+            if corrected_time is not None:
+                self.results['corrected_response_times'].record(corrected_time)
+            if status_code:
+                self.results['status_codes'][status_code] += 1
+            if success:
+                self.results['successful_requests'] += 1
+            else:
+                self.results['failed_requests'] += 1
+            if timeout:
+                self.results['timeouts'] += 1
+            if error and status_code == 0:
+                self.results['errors'][error] += 1
+            for breakdown, key in (('routes', route.name if route else None), ('backends', backend)):
+                if key is None:
+                    continue
+                stats = self.results[breakdown].get(key)
+                if stats is None:
+                    stats = self.results[breakdown][key] = self._new_group_stats()
+                stats['total_requests'] += 1
+                stats['response_times'].record(response_time)
+                if status_code:
+                    stats['status_codes'][status_code] += 1
+                if success:
+                    stats['successful_requests'] += 1
+                if timeout:
+                    stats['timeouts'] += 1
+        if self.windows is not None:
+            self.windows.record(response_time, status_code, success, timeout, corrected_time, backend)
+
+    def make_request(self, intended_start=None):
+        """Make a single HTTP request and record the result
+
+        When intended_start is given (open-loop mode) the request is also
+        timed from that scheduled send time, so any delay spent waiting for
+        a free worker is charged to the request instead of being omitted.
+        """
+        route = self.scenario.next_route() if self.scenario is not None else None
         start_time = time.time()
+        if intended_start is not None and self.monitor is not None:
+            self.monitor.record_dispatch(start_time - intended_start)
         try:
-            response = requests.get(
-                self.endpoint_url, 
-                timeout=self.timeout,
-                headers={'User-Agent': 'Istio-Resiliency-Tester/1.0'}
-            )
+            if route is None:
+                response = self.http.get(self.endpoint_url, timeout=self.timeout)
+            else:
+                response = self.http.request(route.method, route.url, headers=route.headers,
+                                             data=route.body, timeout=route.timeout)
             end_time = time.time()
             response_time = end_time - start_time
+            corrected_time = end_time - intended_start if intended_start is not None else None
+            # Errors generated by the mesh (e.g. 503 with no healthy upstream)
+            # carry no header and stay unattributed
+            backend = response.headers.get(self.backend_header) if self.backend_header else None
             
-            self.results['total_requests'] += 1
-            self.results['response_times'].append(response_time)
-            self.results['status_codes'][response.status_code] += 1
-            
-            if response.status_code == 200:
-                self.results['successful_requests'] += 1
+            success = response.status_code in route.expect if route else response.status_code == 200
+            if success:
+                self._record(response_time, response.status_code, corrected_time=corrected_time,
+                             route=route, success=True, backend=backend)
                 return True, response_time, response.status_code, None
             else:
-                self.results['failed_requests'] += 1
-                return False, response_time, response.status_code, f"HTTP {response.status_code}"
+                error_msg = f"HTTP {response.status_code}"
+                self._record(response_time, response.status_code, error_msg,
+                             corrected_time=corrected_time, route=route, success=False, backend=backend)
+                return False, response_time, response.status_code, error_msg
                 
         except requests.exceptions.Timeout:
             end_time = time.time()
             response_time = end_time - start_time
-            self.results['total_requests'] += 1
-            self.results['failed_requests'] += 1
-            self.results['timeouts'] += 1
-            self.results['response_times'].append(response_time)
+            corrected_time = end_time - intended_start if intended_start is not None else None
             error_msg = "Request timeout"
-            self.results['errors'].append(error_msg)
+            self._record(response_time, 0, error_msg, timeout=True, corrected_time=corrected_time,
+                         route=route)
             return False, response_time, 0, error_msg
             
         except requests.exceptions.RequestException as e:
             end_time = time.time()
             response_time = end_time - start_time
-            self.results['total_requests'] += 1
-            self.results['failed_requests'] += 1
-            self.results['response_times'].append(response_time)
+            corrected_time = end_time - intended_start if intended_start is not None else None
             error_msg = str(e)
-            self.results['errors'].append(error_msg)
+            self._record(response_time, 0, error_msg, corrected_time=corrected_time, route=route)
             return False, response_time, 0, error_msg
     
-    def run_test(self, num_requests=100, delay_between_requests=0.1):
-        """Run the resiliency test"""
-        print(f"🚀 Starting resiliency test against: {self.endpoint_url}")
-        print(f"📊 Making {num_requests} requests with {delay_between_requests}s delay between requests")
-        print(f"⏱️  Timeout set to {self.timeout}s")
-        print("-" * 80)
+    def print_progress(self, completed, num_requests, start_test_time):
+        """Print a one-line progress report"""
+        if not self.verbose:
+            return
+        with self._lock:
+            success_rate = (self.results['successful_requests'] / completed) * 100
+            avg_response_time = self.results['response_times'].mean
+            backend_counts = {name: stats['total_requests'] for name, stats in self.results['backends'].items()}
+        elapsed = time.time() - start_test_time
+        throughput = completed / elapsed if elapsed > 0 else 0
+        print(f"Progress: {completed:3d}/{num_requests} | "
+              f"Success Rate: {success_rate:5.1f}% | "
+              f"Avg Response Time: {avg_response_time:6.3f}s | "
+              f"Throughput: {throughput:7.1f} req/s" + self.format_split(backend_counts))
+
+    def format_split(self, backend_counts):
+        """' | Split: v1 89.6% (-0.4) v2 10.4% (+0.4)' for progress lines, or '' without --expected-split"""
+        if not self.expected_split:
+            return ""
+        rows = split_skew(backend_counts, self.expected_split)
+        if not rows:
+            return ""
+        return " | Split: " + " ".join(f"{name} {observed:.1f}% ({skew:+.1f})"
+                                       for name, observed, _, skew in rows)
+
+    def run_test(self, num_requests=100, delay_between_requests=0.1, rate=None):
+        """Run the resiliency test
+
+        With rate set, requests are sent open-loop on a fixed arrival
+        schedule (rate per second) regardless of how fast responses come
+        back; otherwise each worker waits for its previous response.
+        """
+        self.rate = rate
+        if self.verbose:
+            if self.scenario is not None:
+                print(f"🚀 Starting resiliency test with a {len(self.scenario.routes)}-route scenario")
+            else:
+                print(f"🚀 Starting resiliency test against: {self.endpoint_url}")
+            if rate:
+                print(f"📊 Making {num_requests} requests at a constant {rate} req/s (open loop)")
+            else:
+                print(f"📊 Making {num_requests} requests with {delay_between_requests}s delay between requests")
+            if self.concurrency > 1:
+                print(f"🧵 Keeping up to {self.concurrency} requests in flight")
+            print(f"🔌 Connection mode: {self.connection_mode}")
+            print(f"⏱️  Timeout set to {self.timeout}s")
+            print("-" * 80)
         
-        start_test_time = time.time()
+        start_test_time = self.start_test_time = time.time()
+        if self.windows is not None:
+            self.windows.start()
+        if self.monitor is not None:
+            self.monitor.start()
         
-        for i in range(num_requests):
-            success, response_time, status_code, error = self.make_request()
-            
-            # Print progress every 10 requests
-            if (i + 1) % 10 == 0:
-                success_rate = (self.results['successful_requests'] / (i + 1)) * 100
-                avg_response_time = sum(self.results['response_times']) / len(self.results['response_times'])
-                print(f"Progress: {i+1:3d}/{num_requests} | "
-                      f"Success Rate: {success_rate:5.1f}% | "
-                      f"Avg Response Time: {avg_response_time:6.3f}s")
-            
-            # Add delay between requests to avoid overwhelming the service
-            if delay_between_requests > 0:
-                time.sleep(delay_between_requests)
+        try:
+            if rate:
+                self._run_open_loop(num_requests, rate, start_test_time)
+            elif self.concurrency > 1:
+                self._run_concurrent(num_requests, delay_between_requests, start_test_time)
+            else:
+                for i in range(num_requests):
+                    self.make_request()
+                    
+                    # Print progress every 10 requests
+                    if (i + 1) % 10 == 0:
+                        self.print_progress(i + 1, num_requests, start_test_time)
+                    
+                    # Add delay between requests to avoid overwhelming the service
+                    if delay_between_requests > 0:
+                        time.sleep(delay_between_requests)
+        finally:
+            if self.windows is not None:
+                self.windows.stop()
+            if self.monitor is not None:
+                self.monitor.stop()
+                self.results['generator'] = self.monitor.summary()
         
         end_test_time = time.time()
         test_duration = end_test_time - start_test_time
+        self.test_duration = test_duration
+        self.close()
         
-        self.print_summary(test_duration)
+        if self.verbose:
+            self.print_summary(test_duration)
         return self.results
+
+    def close(self):
+        self.http.close()
+
+    def snapshot(self):
+        """JSON-friendly copy of the results so far, for merging elsewhere"""
+        with self._lock:
+            results = self.results
+            return {
+                'elapsed': time.time() - self.start_test_time if self.start_test_time else 0.0,
+                'concurrency': self.concurrency,
+                'total_requests': results['total_requests'],
+                'successful_requests': results['successful_requests'],
+                'failed_requests': results['failed_requests'],
+                'timeouts': results['timeouts'],
+                'response_times': results['response_times'].to_dict(),
+                'corrected_response_times': results['corrected_response_times'].to_dict(),
+                'status_codes': {str(code): count for code, count in results['status_codes'].items()},
+                'errors': dict(results['errors']),
+                'generator': self.monitor.summary() if self.monitor is not None else None,
+                **{breakdown: {name: dict(stats, response_times=stats['response_times'].to_dict(),
+                                          status_codes={str(code): count
+                                                        for code, count in stats['status_codes'].items()})
+                               for name, stats in results[breakdown].items()}
+                   for breakdown in BREAKDOWNS},
+            }
+
+    @staticmethod
+    def merge_snapshots(snapshots):
+        """Combine snapshot() dicts from several testers into one results dict"""
+        merged = {
+            'total_requests': 0,
+            'successful_requests': 0,
+            'failed_requests': 0,
+            'timeouts': 0,
+            'response_times': None,
+            'corrected_response_times': None,
+            'status_codes': defaultdict(int),
+            'errors': defaultdict(int),
+            'routes': {},
+            'backends': {}
+        }
+        for snap in snapshots:
+            for key in ('total_requests', 'successful_requests', 'failed_requests', 'timeouts'):
+                merged[key] += snap[key]
+            for key in ('response_times', 'corrected_response_times'):
+                hist = LatencyHistogram.from_dict(snap[key])
+                merged[key] = hist if merged[key] is None else merged[key].merge(hist)
+            for code, count in snap['status_codes'].items():
+                merged['status_codes'][int(code)] += count
+            for error, count in snap['errors'].items():
+                merged['errors'][error] += count
+            for breakdown in BREAKDOWNS:
+                for name, stats in snap.get(breakdown, {}).items():
+                    target = merged[breakdown].get(name)
+                    hist = LatencyHistogram.from_dict(stats['response_times'])
+                    if target is None:
+                        target = merged[breakdown][name] = {
+                            'total_requests': 0, 'successful_requests': 0, 'timeouts': 0,
+                            'response_times': hist, 'status_codes': defaultdict(int)}
+                    else:
+                        target['response_times'].merge(hist)
+                    for key in ('total_requests', 'successful_requests', 'timeouts'):
+                        target[key] += stats[key]
+                    for code, count in stats['status_codes'].items():
+                        target['status_codes'][int(code)] += count
+        generators = [snap['generator'] for snap in snapshots if snap.get('generator')]
+        if generators:
+            merged['generator'] = merge_summaries(generators)
+        return merged
+
+    def _run_concurrent(self, num_requests, delay_between_requests, start_test_time):
+        """Drive num_requests through a pool of self.concurrency workers.
+
+        Each worker issues its next request as soon as the previous one
+        completes (plus the optional delay), so up to `concurrency` requests
+        are in flight at any time.
+        """
+        counters = {'issued': 0, 'completed': 0}
+
+        def worker():
+            while not self._stop.is_set():
+                with self._lock:
+                    if counters['issued'] >= num_requests:
+                        return
+                    counters['issued'] += 1
+                self.make_request()
+                with self._lock:
+                    counters['completed'] += 1
+                    completed = counters['completed']
+                if completed % 10 == 0:
+                    self.print_progress(completed, num_requests, start_test_time)
+                if delay_between_requests > 0:
+                    self._stop.wait(delay_between_requests)
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        futures = [pool.submit(worker) for _ in range(self.concurrency)]
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            # Let in-flight requests drain, but stop issuing new ones
+            self._stop.set()
+            raise
+        finally:
+            pool.shutdown(wait=False)
+
+    def _run_open_loop(self, num_requests, rate, start_test_time):
+        """Send request i at start + i/rate, independent of completions.
+
+        The scheduler never waits for a response. If every worker is busy
+        the request queues, and that queueing time shows up in the
+        corrected latency (measured from the intended send time) instead of
+        silently lowering the offered load.
+        """
+        counters = {'completed': 0}
+
+        def on_done(future, intended_start):
+            error = future.exception() if not future.cancelled() else None
+            if error is not None:
+                # make_request records its own failures; anything escaping it
+                # would otherwise vanish with the future, so count it here
+                elapsed = time.time() - intended_start
+                self._record(elapsed, error=f"{type(error).__name__}: {error}", corrected_time=elapsed)
+            with self._lock:
+                counters['completed'] += 1
+                completed = counters['completed']
+            if completed % 10 == 0:
+                self.print_progress(completed, num_requests, start_test_time)
+
+        interval = 1.0 / rate
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            for i in range(num_requests):
+                intended_start = start_test_time + i * interval
+                if self._stop.wait(max(0.0, intended_start - time.time())):
+                    break
+                if self.monitor is not None:
+                    self.monitor.record_send(time.time() - intended_start)
+                future = pool.submit(self.make_request, intended_start)
+                future.add_done_callback(lambda future, intended_start=intended_start:
+                                         on_done(future, intended_start))
+            pool.shutdown(wait=True)
+        except KeyboardInterrupt:
+            self._stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    @staticmethod
+    def _print_latency_stats(title, histogram):
+        """Print average/min/max and P50/P95/P99 from a latency histogram"""
+        percentiles = histogram.percentiles((50, 95, 99))
+        p50, p95, p99 = percentiles[50], percentiles[95], percentiles[99]
+        
+        print(f"\n⏱️  {title}:")
+        print(f"   • Average:  {histogram.mean:.3f}s")
+        print(f"   • Minimum:  {histogram.min:.3f}s")
+        print(f"   • Maximum:  {histogram.max:.3f}s")
+        print(f"   • 50th percentile (P50): {p50:.3f}s")
+        print(f"   • 95th percentile (P95): {p95:.3f}s")
+        print(f"   • 99th percentile (P99): {p99:.3f}s")
+    
+    @staticmethod
+    def _print_breakdown(groups, total, test_duration):
+        """One line per route or backend: share of requests, throughput, success rate and latency"""
+        for name, stats in sorted(groups.items()):
+            group_total = stats['total_requests']
+            percentiles = stats['response_times'].percentiles((50, 99))
+            codes = ', '.join(f"{code}: {count}" for code, count in sorted(stats['status_codes'].items()))
+            print(f"   • {name}: {group_total:5d} ({group_total / total * 100:5.1f}%) | "
+                  f"{group_total / test_duration:7.1f} req/s | "
+                  f"Success: {stats['successful_requests'] / group_total * 100:5.1f}% | "
+                  f"P50: {percentiles[50]:.3f}s | P99: {percentiles[99]:.3f}s | "
+                  f"Timeouts: {stats['timeouts']}" + (f" | {codes}" if codes else ""))
+    
+    def _print_split(self, total):
+        """Observed backend shares against --expected-split"""
+        counts = {name: stats['total_requests'] for name, stats in self.results['backends'].items()}
+        attributed = sum(counts.values())
+        print(f"\n⚖️  Traffic Split vs Expected (tolerance ±{self.skew_tolerance:g} pts):")
+        if not attributed:
+            print(f"   ❌ No response carried a backend identity"
+                  + (f" ({self.backend_header} header)" if self.backend_header else ""))
+            return
+        worst = 0.0
+        for name, observed, expected, skew in split_skew(counts, self.expected_split):
+            flag = '✅' if abs(skew) <= self.skew_tolerance else '❌'
+            note = "" if name in self.expected_split else " (unexpected backend)"
+            print(f"   {flag} {name}: {observed:5.1f}% observed | {expected:5.1f}% expected | "
+                  f"skew {skew:+5.1f} pts{note}")
+            worst = max(worst, abs(skew))
+        if attributed < total:
+            print(f"   • {total - attributed} response(s) without a backend identity are not counted")
+        if worst > self.skew_tolerance:
+            print(f"   ❌ Split is off by up to {worst:.1f} pts - check the route weights and locality settings")
+        else:
+            print(f"   ✅ Split matches the expected weights (max skew {worst:.1f} pts)")
+    
+    def _print_generator(self, generator):
+        """Load generator health: CPU, scheduling lag, send drift and the verdict"""
+        ms = lambda value: f"{value:.1f} ms" if value is not None else "n/a"
+        print(f"\n🩺 Load Generator Health:")
+        print(f"   • CPU: {generator['cpu_percent']:.0f}% of a core "
+              f"(peak {generator['cpu_peak_percent']:.0f}%) | Threads: {generator['threads']}")
+        def unjudged(key, minimum):
+            if generator.get(f'{key}_judged', True):
+                return ""
+            return f" (insufficient samples: {generator.get(f'{key}_samples', 0)} of {minimum} needed, not judged)"
+
+        print(f"   • Scheduling Lag: P99 {ms(generator['lag_p99_ms'])} | Max {ms(generator['lag_max_ms'])}"
+              + unjudged('lag', MIN_LAG_SAMPLES))
+        if generator['send_drift_p99_ms'] is not None:
+            print(f"   • Send Drift: P99 {ms(generator['send_drift_p99_ms'])} | "
+                  f"Max {ms(generator['send_drift_max_ms'])} | "
+                  f"Dispatch Delay P99: {ms(generator['dispatch_p99_ms'])}"
+                  + unjudged('send_drift', MIN_DRIFT_SAMPLES))
+        if generator['unreliable']:
+            print("   ❌ Results unreliable, the tester was the bottleneck:")
+            for reason in generator['reasons']:
+                print(f"      - {reason}")
+            print("      Spread the load over more processes (--workers N) or pods, or lower it, and rerun")
+        else:
+            print("   ✅ Tester kept up with the load")
+        if self.monitor is not None and self.monitor.stacks:
+            print(f"   • Hottest frames (profile in {generator['profile']}):")
+            for name, share in self.monitor.top_functions():
+                print(f"      - {share:5.1f}% {name}")
     
     def print_summary(self, test_duration):
         """Print test summary and statistics"""
@@ -122,10 +525,17 @@ class ResiliencyTester:
         timeout_rate = (self.results['timeouts'] / total) * 100 if total > 0 else 0
         
         print(f"🎯 Test Configuration:")
-        print(f"   • Endpoint: {self.endpoint_url}")
+        if self.results['routes']:
+            print(f"   • Scenario Routes: {len(self.results['routes'])}")
+        else:
+            print(f"   • Endpoint: {self.endpoint_url}")
         print(f"   • Total Requests: {total}")
+        print(f"   • Concurrency: {self.concurrency}")
+        print(f"   • Connection Mode: {self.connection_mode}")
+        if self.rate:
+            print(f"   • Offered Rate: {self.rate:.2f} req/s")
         print(f"   • Test Duration: {test_duration:.2f}s")
-        print(f"   • Requests/Second: {total/test_duration:.2f}")
+        print(f"   • Achieved Throughput: {total/test_duration:.2f} req/s")
         
         print(f"\n📊 Success/Failure Statistics:")
         print(f"   • Successful Requests: {self.results['successful_requests']:4d} ({success_rate:5.1f}%)")
@@ -134,24 +544,11 @@ class ResiliencyTester:
         
         # Response time statistics
         if self.results['response_times']:
-            response_times = self.results['response_times']
-            avg_time = sum(response_times) / len(response_times)
-            min_time = min(response_times)
-            max_time = max(response_times)
-            
-            # Calculate percentiles
-            sorted_times = sorted(response_times)
-            p50 = sorted_times[int(len(sorted_times) * 0.5)]
-            p95 = sorted_times[int(len(sorted_times) * 0.95)]
-            p99 = sorted_times[int(len(sorted_times) * 0.99)]
-            
-            print(f"\n⏱️  Response Time Statistics:")
-            print(f"   • Average:  {avg_time:.3f}s")
-            print(f"   • Minimum:  {min_time:.3f}s")
-            print(f"   • Maximum:  {max_time:.3f}s")
-            print(f"   • 50th percentile (P50): {p50:.3f}s")
-            print(f"   • 95th percentile (P95): {p95:.3f}s")
-            print(f"   • 99th percentile (P99): {p99:.3f}s")
+            self._print_latency_stats("Response Time Statistics", self.results['response_times'])
+        
+        if self.results['corrected_response_times']:
+            self._print_latency_stats("Corrected Response Time Statistics (from intended send time)",
+                                      self.results['corrected_response_times'])
         
         # HTTP status codes
         if self.results['status_codes']:
@@ -166,19 +563,31 @@ class ResiliencyTester:
                 }.get(status_code, "Unknown")
                 print(f"   • {status_code} ({status_name}): {count:4d} ({percentage:5.1f}%)")
         
+        # Per-route (scenario runs) and per-backend breakdowns
+        for breakdown, title in (('routes', "🛣️  Per-Route Breakdown"),
+                                 ('backends', "🖥️  Per-Backend Distribution")):
+            if self.results[breakdown]:
+                print(f"\n{title}:")
+                self._print_breakdown(self.results[breakdown], total, test_duration)
+        
+        if self.expected_split:
+            self._print_split(total)
+        
         # Error summary
         if self.results['errors']:
-            error_counts = defaultdict(int)
-            for error in self.results['errors']:
-                error_counts[error] += 1
-            
             print(f"\n❌ Error Summary:")
-            for error, count in error_counts.items():
+            for error, count in Counter(self.results['errors']).most_common():
                 percentage = (count / total) * 100
                 print(f"   • {error}: {count} ({percentage:.1f}%)")
         
+        if self.results.get('generator'):
+            self._print_generator(self.results['generator'])
+        
         # Resiliency insights
         print(f"\n🔍 Resiliency Insights:")
+        if self.results.get('generator', {}).get('unreliable'):
+            print("   ⚠️  Load generator was saturated - latency and throughput above describe the tester, "
+                  "not the service")
         if success_rate > 95:
             print("   ✅ Excellent resiliency - very high success rate")
         elif success_rate > 80:
@@ -190,25 +599,131 @@ class ResiliencyTester:
             print("   ⏰ High timeout rate - consider increasing timeout or checking service performance")
         
         if self.results['response_times']:
-            avg_time = sum(self.results['response_times']) / len(self.results['response_times'])
-            if avg_time > 5.0:
+            if self.results['response_times'].mean > 5.0:
                 print("   🐌 High average response time - service may be overloaded")
         
         print("=" * 80)
 
+def build_tester(args, concurrency=None, verbose=True, scenario=None):
+    """HTTP or (for grpc:// endpoints) gRPC tester configured from the CLI arguments"""
+    concurrency = concurrency or args.concurrency
+    if args.endpoint.startswith(GRPC_SCHEMES):
+        from grpcload import GrpcLoadTester
+        return GrpcLoadTester(args.endpoint, args.timeout, concurrency, args.precision / 100.0,
+                              args.channels, args.lb_policy, verbose=verbose,
+                              expected_split=args.expected_split, skew_tolerance=args.skew_tolerance)
+    return ResiliencyTester(args.endpoint, args.timeout, concurrency, args.precision / 100.0,
+                            args.connection, args.pool_size, verbose=verbose, scenario=scenario,
+                            backend_header=args.backend_header or None,
+                            expected_split=args.expected_split, skew_tolerance=args.skew_tolerance)
+
+def save_results(results, path, test_config, compact=False):
+    """Write results plus the run configuration to a JSON file
+
+    Compressed paths (.gz, .bz2, .xz) and compact=True use the compact
+    format from resultsfile.py.
+    """
+    test_config = dict(test_config, timestamp=datetime.now().isoformat())
+    if compact or resultsfile.is_compressed(path):
+        resultsfile.write_compact(results, path, test_config)
+        return
+    results['test_config'] = test_config
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2,
+                  default=lambda o: o.to_dict() if isinstance(o, LatencyHistogram) else str(o))
+
 def main():
-    parser = argparse.ArgumentParser(description='Test Istio resiliency features')
+    if sys.argv[1:2] == ['compare']:
+        resultsfile.compare_main(sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(description='Test Istio resiliency features',
+                                     epilog='Compare saved runs with: resiliencytest.py compare RESULTS RESULTS...')
     parser.add_argument('--endpoint', '-e', 
                        default=os.environ.get('ENDPOINT_URL', 'http://localhost:5000/unstable-endpoint'),
-                       help='Endpoint URL to test (default: ENDPOINT_URL env var or localhost)')
+                       help='Endpoint URL to test; grpc://host:port calls greeting.Greeter/SayHello '
+                            '(default: ENDPOINT_URL env var or localhost)')
     parser.add_argument('--requests', '-r', type=int, default=100,
                        help='Number of requests to make (default: 100)')
     parser.add_argument('--timeout', '-t', type=float, default=10.0,
                        help='Request timeout in seconds (default: 10.0)')
     parser.add_argument('--delay', '-d', type=float, default=0.1,
                        help='Delay between requests in seconds (default: 0.1)')
+    parser.add_argument('--concurrency', '-c', type=int,
+                       help='Number of requests to keep in flight (default: 1, sequential; '
+                            'with --rate: enough workers to cover rate x timeout)')
+    parser.add_argument('--rate', type=float,
+                       help='Open-loop mode: send requests at this constant rate (req/s) '
+                            'regardless of response times; ignores --delay')
+    parser.add_argument('--precision', type=float, default=1.0,
+                       help='Latency histogram precision in percent (default: 1.0)')
+    parser.add_argument('--connection', choices=CONNECTION_MODES, default=KEEP_ALIVE,
+                       help='keep-alive reuses pooled HTTP/1.1 connections; close opens a new '
+                            'connection per request (default: keep-alive)')
+    parser.add_argument('--pool-size', type=int,
+                       help='Maximum pooled connections (default: --concurrency)')
+    parser.add_argument('--channels', type=int, default=1,
+                       help='gRPC endpoints: channels (HTTP/2 connections) to spread calls over (default: 1)')
+    parser.add_argument('--lb-policy', choices=('pick_first', 'round_robin'), default='pick_first',
+                       help='gRPC endpoints: client-side load balancing policy (default: pick_first)')
+    parser.add_argument('--scenario', metavar='FILE',
+                       help='JSON/YAML scenario with a weighted mix of routes, methods, headers, bodies '
+                            'and timeouts (see scenario.py); paths resolve against --endpoint')
+    parser.add_argument('--backend-header', default=BACKEND_HEADER,
+                       help='Response header naming the backend, for the per-backend breakdown; '
+                            f"X-Backend-Pod groups by pod, '' turns it off (default: {BACKEND_HEADER})")
+    parser.add_argument('--expected-split', metavar='NAME=WEIGHT,...',
+                       help='Expected traffic split between backends, e.g. v1=90,v2=10; '
+                            'observed shares and skew are reported live and in the summary')
+    parser.add_argument('--skew-tolerance', type=float, default=5.0,
+                       help='Allowed difference from --expected-split in percentage points (default: 5)')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Sample the tester\'s own thread stacks and write them as collapsed stacks '
+                            '(flamegraph.pl / speedscope) to FILE')
+    parser.add_argument('--profile-interval', type=float, default=10.0,
+                       help='Milliseconds between --profile samples (default: 10)')
     parser.add_argument('--output', '-o', 
-                       help='Output results to JSON file')
+                       help='Output results to JSON file (compressed compact format for .gz/.bz2/.xz)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Write --output in the compact format (see resultsfile.py)')
+    parser.add_argument('--timeseries', metavar='FILE',
+                       help='Write per-interval throughput, success rate, status codes and latency '
+                            'percentiles while the test runs (NDJSON, or CSV for *.csv; - for stdout)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                       help='Window length in seconds for --timeseries (default: 1.0)')
+    dist = parser.add_argument_group('distributed runs',
+                                     'Split the load over several processes or pods and merge the results')
+    dist.add_argument('--workers', type=int,
+                      help='Coordinator: spawn N local worker processes, each sending a share of '
+                           '--requests/--rate with --concurrency requests in flight')
+    dist.add_argument('--listen', type=int, metavar='PORT',
+                      help='Coordinator: accept reports from remote workers on this port')
+    dist.add_argument('--expect', type=int,
+                      help='Coordinator: number of remote workers to wait for (with --listen)')
+    dist.add_argument('--report-to', metavar='HOST:PORT',
+                      help='Worker: run quietly and stream results to a coordinator')
+    dist.add_argument('--worker-id', default=os.environ.get('HOSTNAME', str(os.getpid())),
+                      help='Worker: name reported to the coordinator (default: HOSTNAME)')
+    search = parser.add_argument_group('load search',
+                                       'Find the highest rate that meets an SLO (open-loop steps)')
+    search.add_argument('--search', choices=('ramp', 'binary'),
+                        help='Step the offered rate linearly (ramp) or by doubling and bisection (binary)')
+    search.add_argument('--slo-latency', type=float, metavar='MS',
+                        help='Latency SLO in milliseconds at --slo-percentile')
+    search.add_argument('--slo-percentile', type=float, default=99.0,
+                        help='Percentile the latency SLO applies to (default: 99)')
+    search.add_argument('--slo-success', type=float, default=99.9,
+                        help='Minimum success rate in percent (default: 99.9)')
+    search.add_argument('--start-rate', type=float, default=10.0,
+                        help='First rate to try in req/s (default: 10)')
+    search.add_argument('--max-rate', type=float, default=1000.0,
+                        help='Highest rate to try in req/s (default: 1000)')
+    search.add_argument('--rate-step', type=float,
+                        help='Ramp: rate increase per step in req/s (default: --start-rate)')
+    search.add_argument('--step-duration', type=float, default=10.0,
+                        help='Seconds of load per step (default: 10)')
+    search.add_argument('--search-tolerance', type=float, default=5.0,
+                        help='Binary: stop when the pass/fail rates are within this percent (default: 5)')
     
     args = parser.parse_args()
     
@@ -217,27 +732,140 @@ def main():
         print("❌ Error: No endpoint URL provided. Set ENDPOINT_URL environment variable or use --endpoint flag.")
         sys.exit(1)
     
-    if not args.endpoint.startswith(('http://', 'https://')):
-        print("❌ Error: Endpoint URL must start with http:// or https://")
+    if not args.endpoint.startswith(('http://', 'https://') + GRPC_SCHEMES):
+        print("❌ Error: Endpoint URL must start with http://, https://, grpc:// or grpcs://")
+        sys.exit(1)
+    
+    if args.endpoint.startswith(GRPC_SCHEMES) and args.scenario:
+        print("❌ Error: --scenario describes HTTP routes and cannot be used with a grpc:// endpoint")
+        sys.exit(1)
+    
+    if args.channels < 1:
+        print("❌ Error: --channels must be at least 1")
+        sys.exit(1)
+    
+    if args.rate is not None and args.rate <= 0:
+        print("❌ Error: --rate must be greater than 0")
+        sys.exit(1)
+    
+    if args.interval <= 0:
+        print("❌ Error: --interval must be greater than 0")
+        sys.exit(1)
+    
+    if not 0 < args.precision < 100:
+        print("❌ Error: --precision must be between 0 and 100 (percent)")
+        sys.exit(1)
+    
+    if args.workers is not None and args.workers < 1:
+        print("❌ Error: --workers must be at least 1")
+        sys.exit(1)
+    
+    if args.listen is not None and not args.expect:
+        print("❌ Error: --listen requires --expect N")
+        sys.exit(1)
+    
+    if args.expected_split:
+        try:
+            args.expected_split = parse_split(args.expected_split)
+        except ValueError as e:
+            print(f"❌ Error: invalid --expected-split: {e}")
+            sys.exit(1)
+    
+    if args.profile_interval <= 0:
+        print("❌ Error: --profile-interval must be greater than 0")
+        sys.exit(1)
+    
+    if args.skew_tolerance < 0:
+        print("❌ Error: --skew-tolerance must not be negative")
+        sys.exit(1)
+    
+    scenario = None
+    if args.scenario:
+        from scenario import load_scenario
+        try:
+            scenario = load_scenario(args.scenario, args.endpoint, args.timeout)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"❌ Error: invalid scenario {args.scenario}: {e}")
+            sys.exit(1)
+    
+    if args.search:
+        if args.workers or args.listen or args.report_to:
+            print("❌ Error: --search runs in a single process; drop the distributed-run options")
+            sys.exit(1)
+        if args.start_rate <= 0 or args.max_rate < args.start_rate or args.step_duration <= 0:
+            print("❌ Error: need 0 < --start-rate <= --max-rate and --step-duration > 0")
+            sys.exit(1)
+        if args.rate_step is None:
+            args.rate_step = args.start_rate
+        if args.rate_step <= 0 or args.search_tolerance <= 0:
+            print("❌ Error: --rate-step and --search-tolerance must be greater than 0")
+            sys.exit(1)
+        import loadsearch
+        try:
+            loadsearch.run_search(args, scenario)
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Search interrupted by user")
+            sys.exit(1)
+        return
+    
+    if args.workers or args.listen:
+        import loadcoordinator
+        try:
+            loadcoordinator.run_coordinator(args)
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Test interrupted by user")
+            sys.exit(1)
+        return
+    
+    if args.concurrency is None:
+        # In open-loop mode size the pool so every request that can be
+        # outstanding before it times out has a worker; otherwise sequential
+        args.concurrency = min(1000, math.ceil(args.rate * args.timeout)) if args.rate else 1
+    
+    if args.concurrency < 1:
+        print("❌ Error: --concurrency must be at least 1")
+        sys.exit(1)
+    
+    if args.pool_size is not None and args.pool_size < 1:
+        print("❌ Error: --pool-size must be at least 1")
         sys.exit(1)
     
     try:
         # Create tester and run test
-        tester = ResiliencyTester(args.endpoint, args.timeout)
-        results = tester.run_test(args.requests, args.delay)
+        tester = build_tester(args, verbose=not args.report_to, scenario=scenario)
+        if args.profile:
+            tester.monitor = GeneratorMonitor(profile_path=args.profile,
+                                              profile_interval=args.profile_interval / 1000.0)
+        if args.timeseries:
+            from timeseries import WindowedMetrics
+            tester.windows = WindowedMetrics(args.timeseries, args.interval,
+                                             precision=args.precision / 100.0,
+                                             expected_split=args.expected_split)
+        if args.report_to:
+            import loadcoordinator
+            results = loadcoordinator.run_worker(tester, args)
+        else:
+            results = tester.run_test(args.requests, args.delay, args.rate)
         
         # Save results to file if requested
         if args.output:
-            results['test_config'] = {
+            save_results(results, args.output, {
                 'endpoint': args.endpoint,
                 'requests': args.requests,
                 'timeout': args.timeout,
                 'delay': args.delay,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            with open(args.output, 'w') as f:
-                json.dump(results, f, indent=2)
+                'concurrency': args.concurrency,
+                'rate': args.rate,
+                'precision': args.precision,
+                'connection': args.connection,
+                'pool_size': tester.http.pool_size,
+                'scenario': args.scenario,
+                'channels': args.channels,
+                'lb_policy': args.lb_policy,
+                'backend_header': args.backend_header,
+                'expected_split': args.expected_split,
+                'test_duration': tester.test_duration,
+            }, args.compact)
             print(f"\n💾 Results saved to: {args.output}")
         
     except KeyboardInterrupt:
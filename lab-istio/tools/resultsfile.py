@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Compact result files for resiliencytest.py and an offline run comparator
+
+--output FILE normally writes indented JSON. With --compact, or when FILE
+ends in .gz, .bz2 or .xz (which also compresses it), the results are
+written in a compact form instead:
+
+- no indentation and no derived data (the per-histogram percentile summary
+  is recomputed on load)
+- each latency histogram stored as two columns: the gaps between the
+  indexes of its non-empty buckets and their counts, e.g.
+  {"index": [412, 1, 1, 3], "counts": [5, 40, 22, 1], ...}
+
+so a run of any length stays a few KB, and is written straight through
+the compressor without building the whole document as a string first.
+
+compare loads two or more result files (compact, indented, compressed or
+not, from single or distributed runs) and prints throughput, success rate
+and latency percentiles of each run with the change against the first.
+Raw latencies are always compared with raw ones; corrected latencies
+(open-loop --rate runs) get their own rows, compared only when the
+baseline has them too.
+Percentiles are read from the histogram buckets and only a small summary
+per run is kept, so no per-request values are expanded into lists (older
+files that stored every response time are folded into a histogram).
+
+Usage:
+    python3 resiliencytest.py --requests 100000 --rate 200 --output run.json.gz
+    python3 resiliencytest.py compare baseline.json.gz run.json.gz [more runs...]
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import sys
+
+from latencyhistogram import LatencyHistogram
+
+COMPACT_FORMAT = 'resiliencytest-compact/1'
+COMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+HISTOGRAM_KEYS = ('response_times', 'corrected_response_times')
+# Per-route and per-backend sections, as in ResiliencyTester.results
+BREAKDOWNS = ('routes', 'backends')
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _open(path, mode):
+    for extension, opener in COMPRESSORS.items():
+        if path.endswith(extension):
+            return opener(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def is_compressed(path):
+    return path.endswith(tuple(COMPRESSORS))
+
+
+def encode_histogram(hist):
+    """Columnar form of a histogram: index gaps and counts of non-empty buckets"""
+    index, counts, previous = [], [], 0
+    for i, bucket_count in enumerate(hist.counts):
+        if bucket_count:
+            index.append(i - previous)
+            counts.append(bucket_count)
+            previous = i
+    return {
+        'precision': hist.precision, 'lowest': hist.lowest, 'highest': hist.highest,
+        'count': hist.count, 'sum': hist.total, 'min': hist.min, 'max': hist.max,
+        'index': index, 'counts': counts,
+    }
+
+
+def decode_histogram(data):
+    """LatencyHistogram from encode_histogram() output, to_dict() output or a plain list of seconds"""
+    if isinstance(data, list):
+        # Result files from before histograms held every response time
+        hist = LatencyHistogram()
+        for value in data:
+            hist.record(value)
+        return hist
+    if 'buckets' in data:
+        return LatencyHistogram.from_dict(data)
+    hist = LatencyHistogram(data['precision'], data['lowest'], data['highest'])
+    position = 0
+    for gap, bucket_count in zip(data['index'], data['counts']):
+        position += gap
+        hist.counts[position] = bucket_count
+    hist.count, hist.total = data['count'], data['sum']
+    hist.min, hist.max = data['min'], data['max']
+    return hist
+
+
+def write_compact(results, path, test_config):
+    """Write results (as built by ResiliencyTester) in the compact format"""
+    document = {key: value for key, value in results.items()
+                if key not in HISTOGRAM_KEYS and key not in BREAKDOWNS}
+    document['format'] = COMPACT_FORMAT
+    document['test_config'] = test_config
+    for key in HISTOGRAM_KEYS:
+        document[key] = encode_histogram(results[key])
+    for breakdown in BREAKDOWNS:
+        document[breakdown] = {
+            name: dict(stats, response_times=encode_histogram(stats['response_times']))
+            for name, stats in results.get(breakdown, {}).items()
+        }
+    with _open(path, 'w') as f:
+        json.dump(document, f, separators=(',', ':'), default=str)
+
+
+def load_results(path):
+    """Any results file as a dict whose latency histograms are LatencyHistogram objects"""
+    with _open(path, 'r') as f:
+        document = json.load(f)
+    for key in HISTOGRAM_KEYS:
+        if document.get(key):
+            document[key] = decode_histogram(document[key])
+        else:
+            document[key] = LatencyHistogram()
+    for breakdown in BREAKDOWNS:
+        for stats in document.get(breakdown, {}).values():
+            stats['response_times'] = decode_histogram(stats['response_times'])
+    return document
+
+
+def _summary(document):
+    total = document.get('total_requests', 0)
+    duration = (document.get('test_config') or {}).get('test_duration')
+    latencies, corrected = document['response_times'], document['corrected_response_times']
+    return {
+        'requests': total,
+        'throughput': total / duration if duration else None,
+        'success_rate': document.get('successful_requests', 0) / total * 100 if total else None,
+        'percentiles': latencies.percentiles(PERCENTILES),
+        'max': latencies.max,
+        # Only open-loop (--rate) runs have corrected latencies
+        'corrected_percentiles': corrected.percentiles(PERCENTILES) if corrected else None,
+        'corrected_max': corrected.max if corrected else None,
+        'generator': document.get('generator') or {},
+        'routes': {name: (stats['successful_requests'] / stats['total_requests'] * 100
+                          if stats['total_requests'] else None,
+                          stats['response_times'].percentile(99))
+                   for name, stats in document.get('routes', {}).items()},
+    }
+
+
+def _delta(value, baseline):
+    if value is None or not baseline:
+        return ""
+    return f" ({(value - baseline) / baseline * 100:+6.1f}%)"
+
+
+def _print_latencies(percentiles, maximum, base_percentiles, base_max, label, note=""):
+    for percent in PERCENTILES:
+        value = percentiles[percent]
+        delta = _delta(value, base_percentiles[percent]) if base_percentiles else note
+        print(f"   • P{percent:<5g} {label}: {value:.3f}s{delta}")
+    if maximum is not None:
+        delta = _delta(maximum, base_max) if base_percentiles else note
+        print(f"   • Max {label}:    {maximum:.3f}s{delta}")
+
+
+def compare(paths):
+    """Print each run next to the first one"""
+    # Only the small per-run summaries are kept between files
+    summaries = []
+    for path in paths:
+        summaries.append((path, _summary(load_results(path))))
+    base = summaries[0][1]
+
+    print("=" * 80)
+    print(f"📊 RUN COMPARISON (baseline: {summaries[0][0]})")
+    print("=" * 80)
+    for path, run in summaries:
+        print(f"\n📁 {path}")
+        throughput = f"{run['throughput']:.2f} req/s" if run['throughput'] is not None else "n/a (no duration saved)"
+        print(f"   • Requests:     {run['requests']}")
+        print(f"   • Throughput:   {throughput}{_delta(run['throughput'], base['throughput'])}")
+        if run['success_rate'] is not None:
+            print(f"   • Success Rate: {run['success_rate']:.2f}%"
+                  + (f" ({run['success_rate'] - base['success_rate']:+.2f} pts)"
+                     if base['success_rate'] is not None else ""))
+        _print_latencies(run['percentiles'], run['max'], base['percentiles'], base['max'], 'latency')
+        if run['corrected_percentiles']:
+            # Corrected latencies are only compared with corrected ones
+            if base['corrected_percentiles']:
+                _print_latencies(run['corrected_percentiles'], run['corrected_max'],
+                                 base['corrected_percentiles'], base['corrected_max'], 'corrected')
+            else:
+                _print_latencies(run['corrected_percentiles'], run['corrected_max'], None, None,
+                                 'corrected', " (baseline has none)")
+        if run['generator'].get('unreliable'):
+            print(f"   ⚠️  Tester was saturated in this run: {'; '.join(run['generator']['reasons'])}")
+        for name, (success, p99) in sorted(run['routes'].items()):
+            base_route = base['routes'].get(name)
+            delta = _delta(p99, base_route[1]) if base_route else " (not in baseline)"
+            success_text = f"{success:.1f}%" if success is not None else "n/a"
+            print(f"     - route {name}: success {success_text} | P99 {p99:.3f}s{delta}")
+    print("=" * 80)
+    return summaries
+
+
+def compare_main(argv):
+    parser = argparse.ArgumentParser(prog='resiliencytest.py compare',
+                                     description='Compare saved resiliencytest.py results')
+    parser.add_argument('runs', nargs='+', metavar='RESULTS',
+                        help='Result files (.json, compact, or .gz/.bz2/.xz); the first is the baseline')
+    args = parser.parse_args(argv)
+    if len(args.runs) < 2:
+        print("❌ Error: compare needs at least two result files")
+        sys.exit(1)
+    try:
+        compare(args.runs)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: could not read results: {e}")
+        sys.exit(1)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Scenario files for resiliencytest.py: weighted multi-route request mixes
+
+A scenario (JSON, or YAML with PyYAML installed) lists the routes to call
+and how often:
+
+    base_url: http://slowapi.resiliency-lab.svc.cluster.local   # default: --endpoint's host
+    timeout: 5                 # default per-route timeout (default: --timeout)
+    seed: 1                    # shuffles the mix reproducibly (default: 0)
+    headers:                   # sent with every route
+      x-test-run: mix-1
+    routes:
+      - name: fast
+        path: /fast
+        weight: 70
+      - name: slow
+        path: /timeout-test?scenario=slow
+        weight: 10
+        timeout: 10
+      - name: echo
+        method: POST
+        url: http://echocaller.resiliency-lab.svc.cluster.local/echo
+        headers: {traceparent: 00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01}
+        json: {"hello": "mesh"}    # or body: "raw text"
+        expect: [200, 201]         # statuses counted as success (default: [200])
+        weight: 20
+
+Every route is compiled once into a template (absolute URL, merged headers,
+encoded body, timeout), and the mix is laid out in advance as a shuffled
+cycle with each route's exact share, so choosing the next request is one
+counter increment and a list lookup.
+"""
+
+import itertools
+import json
+import os
+import random
+from urllib.parse import urljoin, urlsplit
+
+# Slots in the precomputed mix; shares are exact to 1/MIX_SLOTS
+MIX_SLOTS = 1000
+
+
+class Route:
+    """A precompiled request template"""
+
+    __slots__ = ('name', 'method', 'url', 'headers', 'body', 'timeout', 'expect')
+
+    def __init__(self, name, method, url, headers, body, timeout, expect):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.timeout = timeout
+        self.expect = expect
+
+    def __repr__(self):
+        return f"{self.method} {self.url}"
+
+
+class Scenario:
+    def __init__(self, routes, weights, seed=0):
+        if not routes:
+            raise ValueError("a scenario needs at least one route")
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("route weights must be non-negative and not all zero")
+        self.routes = routes
+        self.weights = weights
+        self._mix = self._build_mix(weights, seed)
+        self._counter = itertools.count()
+
+    @staticmethod
+    def _build_mix(weights, seed):
+        """Route indexes in a shuffled cycle with each route's share of MIX_SLOTS"""
+        total = sum(weights)
+        shares = [weight / total * MIX_SLOTS for weight in weights]
+        counts = [int(share) for share in shares]
+        # Largest remainders get the slots rounding left over
+        by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - counts[i], reverse=True)
+        for i in by_remainder[:MIX_SLOTS - sum(counts)]:
+            counts[i] += 1
+        mix = [i for i, count in enumerate(counts) for _ in range(count)]
+        random.Random(seed).shuffle(mix)
+        return mix
+
+    def next_route(self):
+        """The route for the next request (thread-safe: count() is atomic)"""
+        mix = self._mix
+        return self.routes[mix[next(self._counter) % len(mix)]]
+
+
+def _compile_route(spec, index, base_url, defaults, default_timeout):
+    if 'url' in spec:
+        url = spec['url']
+    elif 'path' in spec:
+        url = urljoin(base_url, spec['path'])
+    else:
+        raise ValueError(f"route {index + 1} needs a url or a path")
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError(f"route {index + 1}: URL must start with http:// or https://")
+
+    headers = dict(defaults)
+    headers.update(spec.get('headers') or {})
+    body = None
+    if 'json' in spec:
+        body = json.dumps(spec['json']).encode()
+        headers.setdefault('Content-Type', 'application/json')
+    elif 'body' in spec:
+        body = spec['body'].encode() if isinstance(spec['body'], str) else spec['body']
+
+    method = spec.get('method', 'GET').upper()
+    name = spec.get('name') or f"{method} {urlsplit(url).path}"
+    expect = frozenset(int(status) for status in spec.get('expect', [200]))
+    return Route(name, method, url, headers, body, float(spec.get('timeout', default_timeout)), expect)
+
+
+def parse_scenario(spec, endpoint, timeout):
+    """Scenario from a parsed scenario document; endpoint supplies the default base URL"""
+    if not isinstance(spec, dict) or not isinstance(spec.get('routes'), list):
+        raise ValueError("a scenario must be a mapping with a 'routes' list")
+    parts = urlsplit(endpoint)
+    base_url = spec.get('base_url') or f"{parts.scheme}://{parts.netloc}/"
+    default_timeout = spec.get('timeout', timeout)
+    defaults = spec.get('headers') or {}
+    routes = [_compile_route(route, i, base_url, defaults, default_timeout)
+              for i, route in enumerate(spec['routes'])]
+    names = [route.name for route in routes]
+    if len(set(names)) != len(names):
+        raise ValueError("route names must be unique (set 'name' on routes sharing a method and path)")
+    weights = [float(route.get('weight', 1)) for route in spec['routes']]
+    return Scenario(routes, weights, spec.get('seed', 0))
+
+
+def load_scenario(path, endpoint, timeout):
+    """Read a JSON or YAML scenario file"""
+    with open(path) as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML scenarios need PyYAML: pip3 install pyyaml")
+        try:
+            spec = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            # json.JSONDecodeError is already a ValueError
+            raise ValueError(f"malformed YAML: {e}")
+    else:
+        spec = json.loads(text)
+    return parse_scenario(spec, endpoint, timeout)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Load-generator self-monitoring for resiliencytest.py
+
+Rising latency means little if the tester itself is the bottleneck: one
+Python process runs its request threads under one GIL, so once it is
+CPU-bound, requests leave late and responses are read late, and that time
+is reported as service latency. GeneratorMonitor watches for this while
+the test runs:
+
+- CPU: the process's CPU time per wall-clock second (100% = one core,
+  which is all the GIL lets Python code use)
+- scheduling lag: a sampler thread sleeps for a fixed interval and
+  records how late it wakes up; under GIL or CPU contention every thread,
+  including the ones sending requests, wakes up this late
+- send drift (open-loop --rate only): how late the scheduler handed each
+  request to the worker pool relative to its place in the arrival
+  schedule, plus the dispatch delay until the request actually started
+  (drift and waiting for a free worker; reported, not judged, since busy
+  workers are usually waiting on a slow service)
+
+At the end the run is flagged as unreliable when the CPU use, the P99 lag
+or the P99 send drift passes its limit; spread the load over more
+processes (--workers) or pods in that case. A P99 is only judged once it
+rests on enough samples: the P99 of a handful of samples is just their
+maximum, and one slow wake-up or one jittery send would flag a short run.
+The lag is sampled every 100 ms and needs MIN_LAG_SAMPLES (a 10 s run);
+the send drift is sampled once per request and needs MIN_DRIFT_SAMPLES.
+Below that the value is reported with "insufficient samples" but not
+judged.
+
+With --profile FILE the monitor also samples the stacks of the tester's
+threads every --profile-interval ms and writes them in the collapsed
+format ("frame;frame;frame count" per line) that flamegraph.pl and
+speedscope read. Threads parked waiting for work (idle pool workers, the
+scheduler sleeping until the next send) are left out, so the profile
+shows where the busy threads spend their time, socket waits included.
+Sampling costs a walk over every thread's stack, so use a longer interval
+with very high --concurrency.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from latencyhistogram import LatencyHistogram
+
+# A run is unreliable when the generator averages more CPU than this (% of
+# one core), or its P99 scheduling lag or P99 send drift exceeds these
+CPU_LIMIT = 85.0
+LAG_LIMIT = 0.020
+DRIFT_LIMIT = 0.010
+SAMPLE_INTERVAL = 0.1
+# Samples needed before the P99 lag (10 s at SAMPLE_INTERVAL) or the P99
+# send drift (one per request) is judged
+MIN_LAG_SAMPLES = 100
+MIN_DRIFT_SAMPLES = 1000
+# Innermost frames of a thread with nothing to do: (file, function)
+IDLE_FRAMES = {('threading.py', 'wait'), ('thread.py', '_worker'), ('queue.py', 'get')}
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def _reasons(cpu_percent, lag_ms, drift_ms):
+    """Why a run with these numbers is unreliable (empty when it is not)"""
+    reasons = []
+    if cpu_percent is not None and cpu_percent > CPU_LIMIT:
+        reasons.append(f"tester CPU averaged {cpu_percent:.0f}% of a core (limit {CPU_LIMIT:g}%)")
+    if lag_ms is not None and lag_ms > LAG_LIMIT * 1000:
+        reasons.append(f"P99 scheduling lag {lag_ms:.1f} ms (limit {LAG_LIMIT * 1000:g} ms)")
+    if drift_ms is not None and drift_ms > DRIFT_LIMIT * 1000:
+        reasons.append(f"P99 send drift {drift_ms:.1f} ms (limit {DRIFT_LIMIT * 1000:g} ms)")
+    return reasons
+
+
+class GeneratorMonitor:
+    def __init__(self, interval=SAMPLE_INTERVAL, profile_path=None, profile_interval=0.01):
+        self.interval = interval
+        self.profile_path = profile_path
+        self.profile_interval = profile_interval
+        self.lag = LatencyHistogram()
+        # Filled by the open-loop scheduler (one thread) and its workers
+        self.drift = LatencyHistogram()
+        self.dispatch = LatencyHistogram()
+        self._lock = threading.Lock()
+        self.cpu_peak = 0.0
+        self.threads_peak = threading.active_count()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start = None
+        self._end = None
+
+    def start(self):
+        self._start = (time.perf_counter(), time.process_time())
+        self._threads = [threading.Thread(target=self._sample_lag, daemon=True)]
+        if self.profile_path:
+            self._threads.append(threading.Thread(target=self._sample_stacks, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._end = (time.perf_counter(), time.process_time())
+        if self.profile_path:
+            self.write_profile(self.profile_path)
+
+    def record_send(self, drift):
+        """How late the scheduler submitted one request (scheduler thread only)"""
+        self.drift.record(max(0.0, drift))
+
+    def record_dispatch(self, delay):
+        """Time from a request's scheduled send to its start (any worker thread)"""
+        with self._lock:
+            self.dispatch.record(max(0.0, delay))
+
+    def _sample_lag(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        while True:
+            expected = wall + self.interval
+            if self._stop.wait(self.interval):
+                return
+            now, now_cpu = time.perf_counter(), time.process_time()
+            self.lag.record(max(0.0, now - expected))
+            self.cpu_peak = max(self.cpu_peak, (now_cpu - cpu) / (now - wall) * 100)
+            self.threads_peak = max(self.threads_peak, threading.active_count())
+            wall, cpu = now, now_cpu
+
+    def _sample_stacks(self):
+        own = {thread.ident for thread in self._threads} | {threading.get_ident()}
+        while not self._stop.wait(self.profile_interval):
+            for ident, frame in sys._current_frames().items():
+                code = frame.f_code
+                if ident in own or (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def write_profile(self, path):
+        """Collapsed stacks, most frequent first"""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, count=5):
+        """(leaf frame, share of samples %) of the most sampled frames"""
+        leaves = Counter()
+        for stack, samples in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += samples
+        total = sum(leaves.values())
+        return [(name, samples / total * 100) for name, samples in leaves.most_common(count)]
+
+    def summary(self):
+        """JSON-friendly report of the run so far, with the reliability verdict"""
+        wall, cpu = self._end or (time.perf_counter(), time.process_time())
+        elapsed = wall - self._start[0] if self._start else 0.0
+        cpu_percent = (cpu - self._start[1]) / elapsed * 100 if elapsed > 0 else 0.0
+        drift = self.drift.percentile(99) if self.drift.count else None
+        with self._lock:
+            dispatch = self.dispatch.percentile(99) if self.dispatch.count else None
+        lag = self.lag.percentile(99) if self.lag.count else None
+        lag_judged = self.lag.count >= MIN_LAG_SAMPLES
+        drift_judged = self.drift.count >= MIN_DRIFT_SAMPLES
+
+        reasons = _reasons(cpu_percent, _ms(lag) if lag_judged else None,
+                           _ms(drift) if drift_judged else None)
+        return {
+            'cpu_percent': round(cpu_percent, 1),
+            'cpu_peak_percent': round(self.cpu_peak, 1),
+            'lag_p99_ms': _ms(lag),
+            'lag_max_ms': _ms(self.lag.max),
+            'lag_samples': self.lag.count,
+            'lag_judged': lag_judged,
+            'send_drift_p99_ms': _ms(drift),
+            'send_drift_max_ms': _ms(self.drift.max),
+            'send_drift_samples': self.drift.count,
+            'send_drift_judged': drift_judged,
+            'dispatch_p99_ms': _ms(dispatch),
+            'threads': self.threads_peak,
+            'unreliable': bool(reasons),
+            'reasons': reasons,
+            'profile': self.profile_path,
+        }
+
+
+def merge_summaries(summaries):
+    """Worst case over several workers' summaries (one saturated worker skews the merged run)"""
+    merged = {}
+    for key in ('cpu_percent', 'cpu_peak_percent', 'lag_p99_ms', 'lag_max_ms', 'send_drift_p99_ms',
+                'send_drift_max_ms', 'dispatch_p99_ms', 'threads'):
+        values = [summary[key] for summary in summaries if summary.get(key) is not None]
+        merged[key] = max(values) if values else None
+    # Only workers with enough samples count towards the lag and drift verdicts
+    judged = {}
+    for key in ('lag', 'send_drift'):
+        values = [summary[f'{key}_p99_ms'] for summary in summaries
+                  if summary.get(f'{key}_judged') and summary.get(f'{key}_p99_ms') is not None]
+        merged[f'{key}_samples'] = min(summary.get(f'{key}_samples', 0) for summary in summaries)
+        merged[f'{key}_judged'] = bool(values)
+        judged[key] = max(values) if values else None
+    merged['reasons'] = _reasons(merged['cpu_percent'], judged['lag'], judged['send_drift'])
+    merged['unreliable'] = bool(merged['reasons'])
+    merged['profile'] = None
+    return merged
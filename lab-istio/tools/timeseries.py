@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Windowed time-series metrics for resiliencytest.py
+
+Cumulative numbers hide what happens while a circuit breaker opens or a
+canary shifts traffic. WindowedMetrics cuts the run into fixed intervals
+(1s by default) and writes one row per window while the test is running:
+throughput, success rate, status-code mix and latency percentiles, plus
+the requests each backend answered (see --backend-header) and, with
+--expected-split, the largest skew from the expected split in that window,
+so a traffic shift shows up when it happens rather than averaged away.
+
+Output is line-delimited JSON (one object per window) or CSV, chosen by
+format or by the file extension (.csv). Use '-' to write to stdout.
+
+Example NDJSON row:
+    {"t": 3.0, "interval": 1.0, "requests": 212, "throughput": 212.0,
+     "success_rate": 97.6, "timeouts": 0, "status_codes": {"200": 207, "503": 5},
+     "p50": 0.041, "p95": 0.118, "p99": 0.204, "max": 0.311,
+     "backends": {"v1": 190, "v2": 22}, "max_skew": 0.4}
+"""
+
+import csv
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from latencyhistogram import LatencyHistogram
+from trafficsplit import split_skew
+
+CSV_FIELDS = ['t', 'interval', 'requests', 'throughput', 'success_rate', 'timeouts',
+              'status_codes', 'p50', 'p95', 'p99', 'max', 'corrected_p99', 'backends', 'max_skew']
+
+
+def _seconds(value):
+    """Round latencies to microseconds to keep rows compact"""
+    return round(value, 6) if value is not None else None
+
+
+class _Window:
+    def __init__(self, precision):
+        self.requests = 0
+        self.successes = 0
+        self.timeouts = 0
+        self.status_codes = defaultdict(int)
+        self.backends = defaultdict(int)
+        self.latency = LatencyHistogram(precision)
+        self.corrected = LatencyHistogram(precision)
+
+
+class WindowedMetrics:
+    def __init__(self, path, interval=1.0, fmt=None, precision=0.01, expected_split=None):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        self.path = path
+        self.interval = interval
+        self.format = fmt or ('csv' if path.endswith('.csv') else 'ndjson')
+        self.precision = precision
+        self.expected_split = expected_split
+        self._lock = threading.Lock()
+        self._window = _Window(precision)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._file = None
+        self._csv = None
+        self.start_time = None
+        self._window_start = None
+
+    def record(self, response_time, status_code=0, success=False, timeout=False, corrected_time=None,
+               backend=None):
+        """Count one request in the current window (thread-safe)
+
+        success is the caller's verdict (e.g. a scenario route's expected
+        statuses), so windows agree with the run's summary.
+        """
+        with self._lock:
+            window = self._window
+            window.requests += 1
+            window.latency.record(response_time)
+            if corrected_time is not None:
+                window.corrected.record(corrected_time)
+            if status_code:
+                window.status_codes[status_code] += 1
+            if success:
+                window.successes += 1
+            if timeout:
+                window.timeouts += 1
+            if backend is not None:
+                window.backends[backend] += 1
+
+    def start(self):
+        self._file = sys.stdout if self.path == '-' else open(self.path, 'w', newline='')
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+        self.start_time = self._window_start = time.time()
+        self._thread.start()
+
+    def stop(self):
+        """Write the final (possibly partial) window and close the output"""
+        self._stop.set()
+        self._thread.join()
+        self._flush(time.time())
+        if self._file is not sys.stdout:
+            self._file.close()
+
+    def _loop(self):
+        window_end = self.start_time + self.interval
+        # Windows end on a fixed schedule, so a slow write never shifts them
+        while not self._stop.wait(max(0.0, window_end - time.time())):
+            self._flush(window_end)
+            window_end += self.interval
+
+    def _flush(self, window_end):
+        with self._lock:
+            window, self._window = self._window, _Window(self.precision)
+        window_start, self._window_start = self._window_start, window_end
+        interval = max(1e-9, window_end - window_start)
+        percentiles = window.latency.percentiles((50, 95, 99))
+        row = {
+            't': round(window_start - self.start_time, 3),
+            'interval': round(interval, 3),
+            'requests': window.requests,
+            'throughput': round(window.requests / interval, 2),
+            'success_rate': round(window.successes / window.requests * 100, 2) if window.requests else None,
+            'timeouts': window.timeouts,
+            'status_codes': {str(code): count for code, count in sorted(window.status_codes.items())},
+            'p50': _seconds(percentiles[50]) if window.requests else None,
+            'p95': _seconds(percentiles[95]) if window.requests else None,
+            'p99': _seconds(percentiles[99]) if window.requests else None,
+            'max': _seconds(window.latency.max),
+            'corrected_p99': _seconds(window.corrected.percentile(99)) if window.corrected.count else None,
+            'backends': dict(sorted(window.backends.items())),
+            'max_skew': None,
+        }
+        if self.expected_split and window.backends:
+            skews = split_skew(window.backends, self.expected_split)
+            row['max_skew'] = round(max(abs(skew) for *_, skew in skews), 2)
+        if self._csv:
+            for key in ('status_codes', 'backends'):
+                row[key] = ';'.join(f"{name}:{count}" for name, count in row[key].items())
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + '\n')
+        self._file.flush()
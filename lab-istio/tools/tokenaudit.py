@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Token audit: validate a stream of JWTs (one per line)
+
+Reads access tokens from a file or stdin and writes one NDJSON result per
+input line (status, issuer, subject, expiry; never the token itself) plus
+an aggregate summary with throughput on stderr. Tokens are checked for:
+
+- signature, against the tenant's JWKS (only with --tenant; RSA verification
+  is CPU bound, so it runs in a process pool)
+- issuer, when --issuer is given
+- expiry
+
+Identical tokens are only validated once; repeats are answered from a cache.
+
+Usage:
+    python3 tokenaudit.py tokens.txt --tenant $TENANT_ID > results.ndjson
+    cat tokens.txt | python3 tokenaudit.py - --workers 8
+
+Requirements:
+    - pip3 install pyjwt cryptography requests
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import jwt
+
+from accesstokenentra_validate import JwksKeyStore, KeyNotFoundError
+
+# Lines validated per round trip to the pool; bounds memory for huge inputs
+BATCH_SIZE = 2000
+
+# Per-process state, set up by _init_worker
+_key_store = None
+_issuer = None
+
+
+def _init_worker(tenant_id, issuer):
+    global _key_store, _issuer
+    _key_store = JwksKeyStore.for_tenant(tenant_id) if tenant_id else None
+    _issuer = issuer
+
+
+def check_token(token):
+    """Validate one token; returns a JSON-friendly result dict"""
+    try:
+        return _check_token(token)
+    except Exception as e:
+        # e.g. the JWKS could not be fetched at all; one bad token must not
+        # stop the audit (or break the process pool's map)
+        return {'status': 'error', 'valid': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+def _check_token(token):
+    try:
+        header = jwt.get_unverified_header(token)
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError as e:
+        return {'status': 'malformed', 'valid': False, 'error': str(e)}
+
+    result = {
+        'iss': claims.get('iss'),
+        'sub': claims.get('sub'),
+        'oid': claims.get('oid'),
+        'exp': claims.get('exp'),
+        'kid': header.get('kid'),
+    }
+    status = 'valid'
+    if _key_store is not None:
+        try:
+            key = _key_store.get_key(header.get('kid'))
+            # Expiry and issuer are reported separately below
+            jwt.decode(token, key, algorithms=["RS256"],
+                       options={"verify_exp": False, "verify_aud": False, "verify_iss": False})
+        except KeyNotFoundError as e:
+            status, result['error'] = 'unknown_kid', str(e)
+        except jwt.InvalidTokenError as e:
+            status, result['error'] = 'invalid_signature', str(e)
+    if status == 'valid' and _issuer and claims.get('iss') != _issuer:
+        status = 'wrong_issuer'
+    if status == 'valid' and isinstance(claims.get('exp'), (int, float)) and claims['exp'] < time.time():
+        status = 'expired'
+    result['status'] = status
+    result['valid'] = status == 'valid'
+    return result
+
+
+class _ResultCache:
+    """LRU of token digest -> result, so repeated tokens are validated once"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, digest):
+        result = self._entries.get(digest)
+        if result is not None:
+            self._entries.move_to_end(digest)
+        return result
+
+    def put(self, digest, result):
+        self._entries[digest] = result
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def _batches(lines):
+    batch = []
+    for line_number, line in enumerate(lines, 1):
+        token = line.strip()
+        if token:
+            batch.append((line_number, token))
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def audit(lines, out, tenant_id=None, issuer=None, workers=1, cache_size=100000):
+    """Validate every token in lines, writing NDJSON to out; returns stats"""
+    cache = _ResultCache(cache_size)
+    stats = Counter()
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tenant_id, issuer))
+    else:
+        _init_worker(tenant_id, issuer)
+
+    try:
+        for batch in _batches(lines):
+            digests = [hashlib.sha256(token.encode()).hexdigest() for _, token in batch]
+            # Validate each distinct, uncached token in this batch exactly once
+            known, pending = {}, {}
+            for digest, (_, token) in zip(digests, batch):
+                if digest in known or digest in pending:
+                    continue
+                cached = cache.get(digest)
+                if cached is not None:
+                    known[digest] = cached
+                else:
+                    pending[digest] = token
+            if pending:
+                if pool is not None:
+                    chunksize = max(1, len(pending) // (workers * 4))
+                    results = pool.map(check_token, pending.values(), chunksize=chunksize)
+                else:
+                    results = map(check_token, pending.values())
+                for digest, result in zip(pending, results):
+                    known[digest] = result
+                    # Errors may be transient, so repeats are checked again
+                    if result['status'] != 'error':
+                        cache.put(digest, result)
+            stats['validated'] += len(pending)
+
+            for digest, (line_number, _) in zip(digests, batch):
+                result = known[digest]
+                stats['tokens'] += 1
+                stats[result['status']] += 1
+                out.write(json.dumps(dict(result, line=line_number, token_sha256=digest[:16])) + '\n')
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a stream of JWT access tokens')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='File with one token per line, or - for stdin (default: -)')
+    parser.add_argument('--tenant', default=os.getenv('TENANT_ID'),
+                        help='Entra ID tenant whose JWKS verifies signatures '
+                             '(default: TENANT_ID env var; without it signatures are not checked)')
+    parser.add_argument('--issuer',
+                        help='Expected iss claim; other issuers are reported as wrong_issuer')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1,
+                        help='Verification processes (default: number of CPUs)')
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help='Distinct tokens remembered for deduplication (default: 100000)')
+    parser.add_argument('--output', '-o',
+                        help='Write NDJSON results here instead of stdout')
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.cache_size < 1:
+        print("❌ Error: --workers and --cache-size must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    start = time.time()
+    try:
+        stats = audit(source, out, args.tenant, args.issuer, args.workers, args.cache_size)
+    except KeyboardInterrupt:
+        print("\n⏹️  Audit interrupted by user", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    duration = time.time() - start
+
+    total = stats['tokens']
+    summary = sys.stderr
+    print("=" * 60, file=summary)
+    print("🔐 TOKEN AUDIT SUMMARY", file=summary)
+    print("=" * 60, file=summary)
+    print(f"   • Tokens:            {total}", file=summary)
+    print(f"   • Distinct verified: {stats['validated']} "
+          f"({total - stats['validated']} answered from cache)", file=summary)
+    print(f"   • Signatures:        {'checked against tenant ' + args.tenant if args.tenant else 'not checked'}",
+          file=summary)
+    for status in ('valid', 'expired', 'wrong_issuer', 'invalid_signature', 'unknown_kid', 'malformed',
+                   'error'):
+        if stats[status]:
+            print(f"   • {status:18s} {stats[status]:8d} ({stats[status] / total * 100:5.1f}%)", file=summary)
+    print(f"   • Duration:          {duration:.2f}s", file=summary)
+    print(f"   • Throughput:        {total / duration if duration > 0 else 0:.0f} tokens/s", file=summary)
+
+
+if __name__ == '__main__':
+    main()
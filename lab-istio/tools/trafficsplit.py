@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Traffic split helpers shared by resiliencytest.py and timeseries.py
+
+The backend that answered a request is read from a response header
+(X-Backend-Version by default, set by istioapi/src/identity.py). The
+observed share of each backend is compared with the weights expected from
+the VirtualService, e.g. 'v1=90,v2=10'; the difference in percentage
+points is the skew.
+
+Usage:
+    from trafficsplit import parse_split, split_skew
+
+    split_skew({'v1': 880, 'v2': 120}, parse_split('v1=90,v2=10'))
+"""
+
+# Response header naming the backend that answered (set by istioapi/src/identity.py)
+BACKEND_HEADER = 'X-Backend-Version'
+
+
+def parse_split(text):
+    """{backend: weight} from 'v1=90,v2=10'"""
+    split = {}
+    for part in text.split(','):
+        name, sep, weight = part.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"expected NAME=WEIGHT, got '{part}'")
+        split[name.strip()] = float(weight)
+    if any(weight < 0 for weight in split.values()) or sum(split.values()) <= 0:
+        raise ValueError("weights must be non-negative and not all zero")
+    return split
+
+
+def split_skew(counts, expected):
+    """(backend, observed %, expected %, skew in points) for every backend seen or expected"""
+    total = sum(counts.values())
+    if not total:
+        return []
+    weight_total = sum(expected.values())
+    return [(name, counts.get(name, 0) / total * 100, expected.get(name, 0) / weight_total * 100,
+             (counts.get(name, 0) / total - expected.get(name, 0) / weight_total) * 100)
+            for name in sorted(set(counts) | set(expected))]